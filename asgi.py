@@ -0,0 +1,248 @@
+"""ASGI entry point for CadCrafter.
+
+Request handling runs on an asyncio event loop, plan generation runs in one
+worker process per CPU, and files are streamed back in chunks so a slow
+client only holds a coroutine, not a worker. Serve it with any ASGI server,
+for example:
+
+    pip install uvicorn
+    uvicorn asgi:app
+
+One server worker is enough, as generation already uses every CPU. Region
+queries work across several server workers too when CADCRAFTER_COALESCE_DIR
+names a directory they share, which then holds the specs behind plan ids.
+
+The page, static files and /generate behave like the Flask app in app.py and
+share its configuration. The profiling hook is only served by the Flask app,
+as it would stall the event loop for the length of the profiled generation.
+"""
+import asyncio
+import mimetypes
+import os
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import render_template
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound, RequestEntityTooLarge
+from werkzeug.http import parse_etags, quote_etag
+from werkzeug.security import safe_join
+
+import floorplan
+from app import (OUTPUT_FORMATS, VIEW_FORMATS, app as flask_app, compact_precision, output_format, plan_etag,
+                 plan_spec, region_query, render_shared, resolve_detail)
+
+# Processes generating plans and answering region queries; concurrent
+# requests beyond this wait in line
+GENERATION_WORKERS = int(os.environ.get('CADCRAFTER_GENERATION_WORKERS', 0)) or os.cpu_count()
+# Bytes per body message - each send waits until the client has taken the
+# previous chunk, so a slow download never buffers the whole file
+CHUNK_SIZE = 64 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+_pools = None
+# Generations submitted to the pool and not finished yet, for the 'auto'
+# detail policy
+_in_flight = 0
+# ETag -> future of the generation running for it; identical requests await
+# the same future instead of submitting another generation
+_generations = {}
+
+
+def generation_pools():
+    global _pools
+    if _pools is None:
+        _pools = [ProcessPoolExecutor(1) for _ in range(GENERATION_WORKERS)]
+    return _pools
+
+
+def generation_pool(spec):
+    # Every plan goes to the same worker process, where its model stays
+    # cached for its other formats and its region queries. Plans are spread
+    # by key, so two busy plans can queue behind each other while another
+    # worker is idle; with many plans the load evens out.
+    pools = generation_pools()
+    return pools[int(floorplan.spec_key(spec)[:8], 16) % len(pools)]
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_SIZE:
+            raise RequestEntityTooLarge()
+        if not message.get('more_body', False):
+            return bytes(body)
+
+
+async def send_response(send, status, headers, body=b''):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    for start in range(0, len(body), CHUNK_SIZE):
+        await send({
+            'type': 'http.response.body',
+            'body': body[start:start + CHUNK_SIZE],
+            'more_body': start + CHUNK_SIZE < len(body),
+        })
+    if not body:
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def send_error(send, exc):
+    await send_response(send, exc.code, [('content-type', 'text/plain; charset=utf-8')],
+                        f'{exc.code} {exc.name}: {exc.description}\n'.encode('utf-8'))
+
+
+def request_values(scope, body):
+    # Query string and urlencoded form fields, like Flask's request.values
+    values = MultiDict(urllib.parse.parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+    headers = dict(scope['headers'])
+    content_type = headers.get(b'content-type', b'').decode('latin-1')
+    if body and content_type.startswith('application/x-www-form-urlencoded'):
+        for key, value in urllib.parse.parse_qsl(body.decode('utf-8'), keep_blank_values=True):
+            values.add(key, value)
+    return values, headers
+
+
+async def generate(scope, receive, send):
+    global _in_flight
+    body = await read_body(receive)
+    if body is None:
+        return
+    values, headers = request_values(scope, body)
+    if 'profile' in values:
+        raise NotFound('Profiling is only available in the Flask app')
+    spec = plan_spec(values)
+    lowered_for_load = resolve_detail(spec, values, _in_flight)
+    fmt = output_format(values)
+    precision = compact_precision(values)
+    etag = plan_etag(spec, fmt, precision)
+    max_age = 0 if lowered_for_load else flask_app.config['PLAN_CACHE_MAX_AGE']
+    # May write a file to the shared directory, so off the event loop
+    loop = asyncio.get_running_loop()
+    plan_id = await loop.run_in_executor(None, floorplan.remember_spec, spec, flask_app.config['COALESCE_DIR'])
+    cache_headers = [
+        ('etag', quote_etag(etag)),
+        ('cache-control', f'public, max-age={max_age}'),
+        ('x-plan-id', plan_id),
+        ('x-detail-level', spec['detail']),
+    ]
+
+    # The client already holds this exact plan - answer before generating it
+    if_none_match = headers.get(b'if-none-match')
+    if if_none_match and parse_etags(if_none_match.decode('latin-1')).contains(etag):
+        await send_response(send, 304, cache_headers)
+        return
+
+    # CPU-bound work goes to the process pool, the event loop keeps serving
+    future = _generations.get(etag)
+    if future is None:
+        future = loop.run_in_executor(generation_pool(spec), render_shared, etag, spec, fmt, None, precision)
+        _generations[etag] = future
+        _in_flight += 1
+        future.add_done_callback(lambda _: generation_done(etag))
+    # Shielded, so a client that disconnects does not cancel the generation
+    # for the others waiting on it
+    data = await asyncio.shield(future)
+
+    mimetype, download_name, as_attachment = OUTPUT_FORMATS[fmt]
+    disposition = 'attachment' if as_attachment else 'inline'
+    await send_response(send, 200, [
+        ('content-type', mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'),
+        ('content-length', str(len(data))),
+        ('content-disposition', f'{disposition}; filename={download_name}'),
+        *cache_headers,
+    ], data)
+
+
+async def plan_region(scope, receive, send, plan_id):
+    loop = asyncio.get_running_loop()
+    spec = await loop.run_in_executor(None, floorplan.lookup_spec, plan_id, flask_app.config['COALESCE_DIR'])
+    if spec is None:
+        raise NotFound('Unknown plan id, generate the plan again')
+    values, _ = request_values(scope, b'')
+    bbox, layers, fmt = region_query(values)
+    # Goes to the process that generated the plan, which still holds its model
+    # unless it has since generated MODEL_CACHE_SIZE other plans
+    data = await loop.run_in_executor(generation_pool(spec), floorplan.render_view, spec, bbox, layers, fmt)
+    await send_response(send, 200, [
+        ('content-type', VIEW_FORMATS[fmt]),
+        ('content-length', str(len(data))),
+        ('cache-control', f"public, max-age={flask_app.config['PLAN_CACHE_MAX_AGE']}"),
+    ], data)
+
+
+def generation_done(etag):
+    global _in_flight
+    _in_flight -= 1
+    del _generations[etag]
+
+
+_index_html = None
+
+
+async def index(scope, receive, send):
+    global _index_html
+    if _index_html is None:
+        with flask_app.test_request_context('/'):
+            _index_html = render_template('index.html').encode('utf-8')
+    await send_response(send, 200, [('content-type', 'text/html; charset=utf-8')], _index_html)
+
+
+async def static(scope, receive, send):
+    path = safe_join(flask_app.static_folder, scope['path'][len('/static/'):])
+    if path is None or not os.path.isfile(path):
+        await send_response(send, 404, [('content-type', 'text/plain')], b'404 Not Found\n')
+        return
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    await send_response(send, 200, [
+        ('content-type', mimetypes.guess_type(path)[0] or 'application/octet-stream'),
+        ('content-length', str(len(data))),
+    ], data)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            generation_pools()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            for pool in _pools or ():
+                pool.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'], scope['method']
+    try:
+        if path == '/generate' and method in ('GET', 'POST'):
+            await generate(scope, receive, send)
+        elif path.startswith('/plans/') and path.endswith('/region') and method == 'GET':
+            await plan_region(scope, receive, send, path[len('/plans/'):-len('/region')])
+        elif path == '/' and method == 'GET':
+            await index(scope, receive, send)
+        elif path.startswith('/static/') and method == 'GET':
+            await static(scope, receive, send)
+        else:
+            await send_response(send, 404, [('content-type', 'text/plain')], b'404 Not Found\n')
+    except HTTPException as exc:
+        await send_error(send, exc)
+    except ValueError as exc:
+        # Malformed input - a body that is not UTF-8, or a spec that only
+        # fails in generation - is the client's error, as in the Flask app
+        await send_error(send, BadRequest(str(exc)))
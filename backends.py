@@ -0,0 +1,562 @@
+# Render backends for the floor plan model in planmodel.py. Each renderer
+# takes a FloorPlan and returns the encoded file as bytes.
+import io
+import json
+import math
+import os
+import re
+import uuid
+from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
+
+import ezdxf  # Library for DWG/DXF file generation
+from ezdxf.enums import MAP_TEXT_ENUM_TO_ALIGN_FLAGS
+from ezdxf.lldxf import validator
+from ezdxf.lldxf.tagwriter import TagWriter
+from ezdxf.render.arrows import ARROWS
+from ezdxf.tools import juliandate
+
+from planmodel import LAYERS
+
+
+# DXF
+
+def _dxfattribs(entity):
+    dxfattribs = {'layer': entity.layer}
+    if entity.lineweight is not None:
+        dxfattribs['lineweight'] = entity.lineweight
+    return dxfattribs
+
+
+def _dxf_line(msp, e):
+    return msp.add_line(e.start, e.end, dxfattribs=_dxfattribs(e))
+
+
+def _dxf_polyline(msp, e):
+    return msp.add_lwpolyline(e.vertices, dxfattribs=_dxfattribs(e))
+
+
+def _dxf_arc(msp, e):
+    return msp.add_arc(center=e.center, radius=e.radius, start_angle=e.start_angle,
+                end_angle=e.end_angle, dxfattribs=_dxfattribs(e))
+
+
+def _dxf_circle(msp, e):
+    return msp.add_circle(e.center, e.radius, dxfattribs=_dxfattribs(e))
+
+
+def _dxf_text(msp, e):
+    dxfattribs = _dxfattribs(e)
+    dxfattribs['height'] = e.height
+    return msp.add_text(e.text, dxfattribs=dxfattribs).set_pos(e.insert, align=e.align)
+
+
+def _dxf_dimension(msp, e):
+    # Rendered into its anonymous geometry block, which also writes the dimtxt
+    # override to the entity; CAD programs drop a DIMENSION without a block
+    dimension = msp.add_linear_dim(base=e.base, p1=e.p1, p2=e.p2, dimstyle=e.dimstyle, angle=e.angle,
+                                   override={'dimtxt': e.dimtxt}, dxfattribs=_dxfattribs(e))
+    dimension.render()
+    return dimension.dimension
+
+
+DXF_WRITERS = {
+    'LINE': _dxf_line,
+    'LWPOLYLINE': _dxf_polyline,
+    'ARC': _dxf_arc,
+    'CIRCLE': _dxf_circle,
+    'TEXT': _dxf_text,
+    'DIMENSION': _dxf_dimension,
+}
+
+
+# Entities of the hot types are written as group codes straight from the
+# model instead of being created and exported by ezdxf, whose generic
+# attribute machinery dominates export time on large plans. The tags are
+# exactly those ezdxf writes for the same entity, so the file does not
+# change; CADCRAFTER_FAST_DXF=0 switches back to ezdxf for every entity.
+FAST_DXF_EXPORT = os.environ.get('CADCRAFTER_FAST_DXF', '1') != '0'
+
+# TEXT alignment name -> (halign, valign) group code values
+_TEXT_ALIGN_FLAGS = {
+    align.name: (int(halign), int(valign)) for align, (halign, valign) in MAP_TEXT_ENUM_TO_ALIGN_FLAGS.items()
+}
+
+
+def _fast_common(kind, e, handle, owner):
+    tags = f'  0\n{kind}\n  5\n{handle}\n330\n{owner}\n100\nAcDbEntity\n  8\n{e.layer}\n'
+    if e.lineweight is not None:
+        tags += f'370\n{e.lineweight}\n'
+    return tags
+
+
+def _fast_line(e, handle, owner):
+    (x1, y1), (x2, y2) = e.start, e.end
+    return (f'{_fast_common("LINE", e, handle, owner)}100\nAcDbLine\n'
+            f' 10\n{x1}\n 20\n{y1}\n 30\n0.0\n 11\n{x2}\n 21\n{y2}\n 31\n0.0\n')
+
+
+def _fast_polyline(e, handle, owner):
+    vertices = ''.join(f' 10\n{x}\n 20\n{y}\n' for x, y in e.vertices)
+    return (f'{_fast_common("LWPOLYLINE", e, handle, owner)}100\nAcDbPolyline\n'
+            f' 90\n{len(e.vertices)}\n 70\n0\n{vertices}')
+
+
+def _fast_arc(e, handle, owner):
+    x, y = e.center
+    return (f'{_fast_common("ARC", e, handle, owner)}100\nAcDbCircle\n'
+            f' 10\n{x}\n 20\n{y}\n 30\n0.0\n 40\n{e.radius}\n'
+            f'100\nAcDbArc\n 50\n{e.start_angle}\n 51\n{e.end_angle}\n')
+
+
+def _fast_circle(e, handle, owner):
+    x, y = e.center
+    return (f'{_fast_common("CIRCLE", e, handle, owner)}100\nAcDbCircle\n'
+            f' 10\n{x}\n 20\n{y}\n 30\n0.0\n 40\n{e.radius}\n')
+
+
+def _fast_text(e, handle, owner):
+    text = e.text
+    if not validator.is_valid_one_line_text(text):
+        text = validator.fix_one_line_text(text)
+    halign, valign = _TEXT_ALIGN_FLAGS[e.align]
+    x, y = e.insert
+    # set_pos() stores the position as insert and align point alike
+    return ''.join([
+        _fast_common('TEXT', e, handle, owner),
+        f'100\nAcDbText\n 10\n{x}\n 20\n{y}\n 30\n0.0\n 40\n{e.height}\n  1\n{text}\n',
+        f' 72\n{halign}\n' if halign else '',
+        f' 11\n{x}\n 21\n{y}\n 31\n0.0\n100\nAcDbText\n',
+        f' 73\n{valign}\n' if valign else '',
+    ])
+
+
+FAST_DXF_WRITERS = {
+    'LINE': _fast_line,
+    'LWPOLYLINE': _fast_polyline,
+    'ARC': _fast_arc,
+    'CIRCLE': _fast_circle,
+    'TEXT': _fast_text,
+}
+
+
+def new_dxf_document(layers=LAYERS):
+    doc = ezdxf.new('R2010')  # AutoCAD 2010 format
+
+    # Setup layers with different colors
+    for name, color in layers.items():
+        doc.layers.new(name=name, dxfattribs={'color': color})
+    return doc
+
+
+def export_entities(msp, entities, stream):
+    # Adds entities to msp's document and writes their ENTITIES section tags
+    # to stream, in order. Directly written entities only take a handle, so
+    # handles come out as if ezdxf had created every entity.
+    tagwriter = TagWriter(stream, dxfversion=msp.doc.dxfversion)
+    handles = msp.doc.entitydb.handles
+    owner = msp.layout_key
+    for entity in entities:
+        fast_writer = FAST_DXF_WRITERS.get(entity.dxftype) if FAST_DXF_EXPORT else None
+        if fast_writer is not None:
+            stream.write(fast_writer(entity, handles.next(), owner))
+        else:
+            DXF_WRITERS[entity.dxftype](msp, entity).export_dxf(tagwriter)
+
+
+def dxf_document_text(plan, layers=LAYERS):
+    # The document holds only the entities ezdxf created; its ENTITIES
+    # section is replaced by the export of all of them
+    doc = new_dxf_document(layers)
+    stream = io.StringIO()
+    export_entities(doc.modelspace(), plan.entities, stream)
+    text = dxf_text(doc, plan.key)
+    entities_start = text.index(_ENTITIES_SECTION) + len(_ENTITIES_SECTION)
+    entities_end = text.index(_END_SECTION, entities_start)
+    return doc, ''.join([text[:entities_start], stream.getvalue(), text[entities_end:]])
+
+
+def dxf_text(doc, key):
+    # ezdxf registers a CLASS for each entity type in use while writing, in set
+    # order, which follows the per-process string hash seed. Registered sorted
+    # beforehand, the CLASSES section and so the file are the same in every
+    # process.
+    for dxftype in sorted(doc.entitydb.dxf_types_in_use()):
+        doc.classes.add_class(dxftype)
+    stream = io.StringIO()
+    doc.write(stream)
+    return stamp_dxf(stream.getvalue(), key)
+
+
+# Plans are addressed by their spec, so the header dates and GUIDs and the
+# ezdxf markers, which ezdxf fills from the clock and a random source on every
+# write, are replaced: dates by a fixed one and GUIDs by ones derived from the
+# plan's spec key
+PLAN_DATE = datetime(2000, 1, 1)
+_HEADER_STAMP = re.compile(r'^(  9\n\$(TDCREATE|TDUPDATE|VERSIONGUID|FINGERPRINTGUID)\n *[0-9]+\n).*$', re.MULTILINE)
+_EZDXF_MARKER = re.compile(r'^(  1\n)' + re.escape(ezdxf.__version__) + r' @ .*$', re.MULTILINE)
+_OBJECTS_SECTION = '  0\nSECTION\n  2\nOBJECTS\n'
+
+
+def stamp_dxf(text, key):
+    date = repr(juliandate(PLAN_DATE))
+    values = {
+        'TDCREATE': date,
+        'TDUPDATE': date,
+        # The fingerprint identifies the drawing, the version GUID this
+        # revision of it
+        'FINGERPRINTGUID': '{%s}' % str(uuid.UUID(key[:32])).upper(),
+        'VERSIONGUID': '{%s}' % str(uuid.UUID(key[32:64])).upper(),
+    }
+    header_end = text.index(_END_SECTION)
+    header = _HEADER_STAMP.sub(lambda match: match.group(1) + values[match.group(2)], text[:header_end])
+    objects_start = text.index(_OBJECTS_SECTION, header_end)
+    marker = f'{ezdxf.__version__} @ {PLAN_DATE.isoformat()}'
+    objects = _EZDXF_MARKER.sub(lambda match: match.group(1) + marker, text[objects_start:])
+    return ''.join([header, text[header_end:objects_start], objects])
+
+
+def render_dxf(plan, executor=None, precision=None):
+    # With a precision the output is compact: only layers the plan uses, and
+    # geometry quantized to that many decimals (3 = millimetres)
+    layers = LAYERS if precision is None else used_layers(plan)
+    if len(plan.rooms) >= REGION_MIN_ROOMS:
+        doc, text = dxf_regions(plan, executor, layers)
+    else:
+        doc, text = dxf_document_text(plan, layers)
+    if precision is not None:
+        text = compact_dxf(text, precision)
+    return doc.encode(text)
+
+
+def used_layers(plan):
+    used = {entity.layer for entity in plan.entities}
+    return {name: color for name, color in LAYERS.items() if name in used}
+
+
+# Float values of coordinate group codes (10-37). Sizes such as text heights
+# and radii (40-49) are left alone: rounded to few decimals they could become 0
+_FLOAT_TAG = re.compile(r'^( (?:[12][0-9]|3[0-7]))\n(-?[0-9]+\.[0-9]+(?:[eE][-+]?[0-9]+)?)$', re.MULTILINE)
+# Z coordinates (30-37) that are zero, optional for the 2D entities we emit
+_ZERO_Z_TAG = re.compile(r'^ 3[0-7]\n0\n', re.MULTILINE)
+
+
+def compact_dxf(text, precision):
+    # Quantize coordinates in the BLOCKS and ENTITIES sections and drop zero Z
+    # coordinates from entities. Header dates and table values are untouched.
+    def quantize(match):
+        value = f'{round(float(match.group(2)), precision):.{precision}f}'
+        if '.' in value:
+            value = value.rstrip('0').rstrip('.')
+        if value == '-0':
+            value = '0'
+        return f'{match.group(1)}\n{value}'
+    
+    blocks_start = text.index(_BLOCKS_SECTION)
+    entities_start = text.index(_ENTITIES_SECTION, blocks_start)
+    entities_end = text.index(_END_SECTION, entities_start)
+    blocks = _FLOAT_TAG.sub(quantize, text[blocks_start:entities_start])
+    entities = _ZERO_Z_TAG.sub('', _FLOAT_TAG.sub(quantize, text[entities_start:entities_end]))
+    return ''.join([text[:blocks_start], blocks, entities, text[entities_end:]])
+
+
+# Large plans are rendered region by region: every region's entities are
+# created and exported by a separate ezdxf document, possibly in another
+# process, and the exported ENTITIES text is spliced into the main document,
+# which only holds the tables and blocks. The geometry blocks of a region's
+# dimensions are spliced into the main document's BLOCK_RECORD table and
+# BLOCKS section alike; each region numbers its blocks from the count of
+# dimensions before it, so the names are those of a single document.
+# Partitioning depends only on the plan, never on the number of workers, so
+# the output stays byte-identical whether regions run in a pool or inline.
+REGION_MIN_ROOMS = 250
+# Export cost of a region, counted in directly written entities; an entity
+# that ezdxf creates, renders and exports (a DIMENSION) costs about
+# EZDXF_EXPORT_COST
+REGION_SIZE = 5000
+EZDXF_EXPORT_COST = 150
+# Handles a rendered dimension takes: the entity, its block record, block and
+# the entities in the block
+DIMENSION_HANDLES = 24
+
+_BLOCKS_SECTION = '  0\nSECTION\n  2\nBLOCKS\n'
+_ENTITIES_SECTION = '  0\nSECTION\n  2\nENTITIES\n'
+_END_SECTION = '  0\nENDSEC\n'
+_BLOCK_RECORD_TABLE = '  0\nTABLE\n  2\nBLOCK_RECORD\n'
+_END_TABLE = '  0\nENDTAB\n'
+_TABLE_COUNT = re.compile(r'^ 70\n([0-9]+)\n', re.MULTILINE)
+
+
+def partition_regions(entities):
+    # Consecutive runs of entities of about equal export cost, so that the
+    # regions joined in order keep the drawing order. Rooms are drawn row by
+    # row, which makes each run a band of neighbouring rooms.
+    # Costs go by entity type alone, so the regions and with them the handles
+    # are the same with CADCRAFTER_FAST_DXF=0
+    costs = [1 if entity.dxftype in FAST_DXF_WRITERS else EZDXF_EXPORT_COST for entity in entities]
+    total = sum(costs)
+    count = math.ceil(total / REGION_SIZE)
+    regions = []
+    start = spent = 0
+    for i, cost in enumerate(costs):
+        spent += cost
+        if spent * count >= total * (len(regions) + 1):
+            regions.append(entities[start:i + 1])
+            start = i + 1
+    return regions
+
+
+def render_region(job):
+    # Runs in a worker process: create the region's entities in a throwaway
+    # document with handles from the region's own range and export them,
+    # along with the block records and blocks of its dimensions
+    entities, owners, first_handle, handle_limit, first_dimension = job
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    if (msp.layout_key, doc.block_records.head.dxf.handle) != owners:
+        raise RuntimeError(f'modelspace or block table handles differ from the main document {owners}')
+    doc.entitydb.handles.reset('%X' % first_handle)
+    # Dimension blocks are named *D<n> from this counter
+    doc.blocks._anonymous_block_counter = first_dimension
+    stream = io.StringIO()
+    export_entities(msp, entities, stream)
+    if int(str(doc.entitydb.handles), 16) > handle_limit:
+        raise RuntimeError('region used more handles than reserved')
+    
+    records = io.StringIO()
+    blocks = io.StringIO()
+    record_writer = TagWriter(records, dxfversion=doc.dxfversion)
+    block_writer = TagWriter(blocks, dxfversion=doc.dxfversion)
+    count = 0
+    for block_record in doc.block_records:
+        if block_record.dxf.name.startswith('*D'):
+            block_record.export_dxf(record_writer)
+            block_record.export_block_definition(block_writer)
+            count += 1
+    return stream.getvalue(), records.getvalue(), blocks.getvalue(), count
+
+
+def dxf_regions(plan, executor=None, layers=LAYERS):
+    doc = new_dxf_document(layers)
+    msp = doc.modelspace()
+    # The arrow block the dimension blocks insert; the regions create their
+    # own copies, which are not spliced
+    ARROWS.create_block(doc.blocks, ARROWS.closed_filled)
+    owners = (msp.layout_key, doc.block_records.head.dxf.handle)
+    
+    # Reserve a separate handle range per region above the main document's
+    # handles, then move the main document past all of them
+    next_handle = int(str(doc.entitydb.handles), 16)
+    dimensions = 0
+    jobs = []
+    for region in partition_regions(plan.entities):
+        region_dimensions = sum(1 for entity in region if entity.dxftype == 'DIMENSION')
+        limit = next_handle + 2 * len(region) + DIMENSION_HANDLES * region_dimensions + 64
+        jobs.append((region, owners, next_handle, limit, dimensions))
+        next_handle = limit
+        dimensions += region_dimensions
+    doc.entitydb.handles.reset('%X' % next_handle)
+    
+    results = list((executor.map if executor is not None else map)(render_region, jobs))
+    
+    text = dxf_text(doc, plan.key)
+    table_start = text.index(_BLOCK_RECORD_TABLE)
+    table_end = text.index(_END_TABLE, table_start)
+    count = _TABLE_COUNT.search(text, table_start)
+    blocks_end = text.index(_END_SECTION, text.index(_BLOCKS_SECTION, table_end))
+    entities_end = text.index(_END_SECTION, text.index(_ENTITIES_SECTION, blocks_end))
+    return doc, ''.join([
+        text[:count.start(1)],
+        str(int(count.group(1)) + sum(result[3] for result in results)),
+        text[count.end(1):table_end],
+        *(result[1] for result in results),
+        text[table_end:blocks_end],
+        *(result[2] for result in results),
+        text[blocks_end:entities_end],
+        *(result[0] for result in results),
+        text[entities_end:],
+    ])
+
+
+# SVG - a preview in drawing units (meters), y axis flipped to screen direction
+
+# AutoCAD color index -> SVG color, darkened where the CAD color would be
+# unreadable on a white background (yellow text, white dimensions)
+SVG_COLORS = {
+    1: '#d00000',
+    2: '#9a7d00',
+    3: '#008000',
+    4: '#008b8b',
+    5: '#0000d0',
+    6: '#b000b0',
+    7: '#000000',
+}
+
+# Paper lineweight in 1/100 mm at 1:100 scale is lineweight / 1000 meters
+DEFAULT_LINEWEIGHT = 25
+
+_HALIGN = {'LEFT': 'start', 'CENTER': 'middle', 'MIDDLE': 'middle', 'RIGHT': 'end'}
+_VALIGN = {'TOP': 'hanging', 'MIDDLE': 'central', 'BOTTOM': 'alphabetic'}
+
+
+def _num(value):
+    return f'{value:.4f}'.rstrip('0').rstrip('.')
+
+
+def _xy(p):
+    return _num(p[0]), _num(-p[1])
+
+
+def _stroke(e):
+    color = SVG_COLORS.get(LAYERS.get(e.layer), '#000000')
+    width = (e.lineweight or DEFAULT_LINEWEIGHT) / 1000
+    return f'stroke="{color}" stroke-width="{_num(width)}"'
+
+
+def _svg_line(e):
+    (x1, y1), (x2, y2) = _xy(e.start), _xy(e.end)
+    return f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" {_stroke(e)}/>'
+
+
+def _svg_polyline(e):
+    points = ' '.join('{},{}'.format(*_xy(p)) for p in e.vertices)
+    return f'<polyline points="{points}" {_stroke(e)}/>'
+
+
+def _svg_arc(e):
+    cx, cy = e.center
+    start = math.radians(e.start_angle)
+    end = math.radians(e.end_angle)
+    sweep = (e.end_angle - e.start_angle) % 360
+    x1, y1 = _xy((cx + e.radius * math.cos(start), cy + e.radius * math.sin(start)))
+    x2, y2 = _xy((cx + e.radius * math.cos(end), cy + e.radius * math.sin(end)))
+    r = _num(e.radius)
+    # DXF arcs run counter-clockwise, which is sweep-flag 0 once y is flipped
+    large = 1 if sweep > 180 else 0
+    return f'<path d="M{x1},{y1} A{r},{r} 0 {large} 0 {x2},{y2}" {_stroke(e)}/>'
+
+
+def _svg_circle(e):
+    cx, cy = _xy(e.center)
+    return f'<circle cx="{cx}" cy="{cy}" r="{_num(e.radius)}" {_stroke(e)}/>'
+
+
+def _svg_text_element(text, x, y, height, color, anchor, baseline, rotate=False):
+    transform = f' transform="rotate(-90 {x} {y})"' if rotate else ''
+    return (f'<text x="{x}" y="{y}" font-size="{_num(height)}" fill="{color}" stroke="none" '
+            f'text-anchor="{anchor}" dominant-baseline="{baseline}"{transform}>{escape(text)}</text>')
+
+
+def _svg_text(e):
+    vertical, _, horizontal = e.align.rpartition('_')
+    if not vertical and horizontal == 'MIDDLE':
+        vertical = 'MIDDLE'
+    x, y = _xy(e.insert)
+    color = SVG_COLORS.get(LAYERS.get(e.layer), '#000000')
+    return _svg_text_element(e.text, x, y, e.height, color, _HALIGN.get(horizontal, 'start'),
+                             _VALIGN.get(vertical, 'alphabetic'))
+
+
+def _svg_dimension(e):
+    (bx, by), p1, p2 = e.base, e.p1, e.p2
+    vertical = e.angle == 90
+    if vertical:
+        a, b = (bx, p1[1]), (bx, p2[1])
+        measurement = abs(p2[1] - p1[1])
+    else:
+        a, b = (p1[0], by), (p2[0], by)
+        measurement = abs(p2[0] - p1[0])
+    parts = []
+    for start, end in ((p1, a), (p2, b), (a, b)):
+        (x1, y1), (x2, y2) = _xy(start), _xy(end)
+        parts.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" {_stroke(e)}/>')
+    mx, my = _xy(((a[0] + b[0]) / 2, (a[1] + b[1]) / 2))
+    color = SVG_COLORS.get(LAYERS.get(e.layer), '#000000')
+    parts.append(_svg_text_element(f'{measurement:.2f}', mx, my, e.dimtxt, color, 'middle', 'text-after-edge',
+                                   rotate=vertical))
+    return '<g>' + ''.join(parts) + '</g>'
+
+
+SVG_WRITERS = {
+    'LINE': _svg_line,
+    'LWPOLYLINE': _svg_polyline,
+    'ARC': _svg_arc,
+    'CIRCLE': _svg_circle,
+    'TEXT': _svg_text,
+    'DIMENSION': _svg_dimension,
+}
+
+
+def svg_element(entity):
+    return SVG_WRITERS[entity.dxftype](entity)
+
+
+def svg_document(elements, extents, margin=1.0):
+    (x0, y0), (x1, y1) = extents
+    view_box = ' '.join(_num(v) for v in (x0 - margin, -y1 - margin, x1 - x0 + 2 * margin, y1 - y0 + 2 * margin))
+    yield f'<svg xmlns="http://www.w3.org/2000/svg" viewBox={quoteattr(view_box)} font-family="sans-serif">\n'
+    yield '<g fill="none" stroke-linecap="round">\n'
+    for element in elements:
+        yield element
+        yield '\n'
+    yield '</g>\n</svg>\n'
+
+
+def render_svg(plan):
+    elements = (svg_element(entity) for entity in plan.entities)
+    return ''.join(svg_document(elements, plan.extents())).encode('utf-8')
+
+
+# JSON
+
+def entity_to_json(entity):
+    data = {'type': entity.dxftype}
+    for name in entity.__slots__:
+        value = getattr(entity, name)
+        if value is not None:
+            data[name] = value
+    return data
+
+
+def render_json(plan):
+    data = {
+        'width': plan.width,
+        'length': plan.length,
+        'wall_thickness': plan.wall_thickness,
+        'layers': LAYERS,
+        'rooms': [
+            {'name': r.name, 'x': r.x, 'y': r.y, 'width': r.width, 'length': r.length}
+            for r in plan.rooms
+        ],
+        'entities': [entity_to_json(entity) for entity in plan.entities],
+    }
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+# Viewport queries - the entities of a plan that intersect a box, framed by
+# that box. Entities are not clipped, so lines may run past the SVG viewBox.
+
+def render_view(entities, bbox, fmt):
+    x0, y0, x1, y1 = bbox
+    if fmt == 'svg':
+        elements = (svg_element(entity) for entity in entities)
+        return ''.join(svg_document(elements, ((x0, y0), (x1, y1)), margin=0)).encode('utf-8')
+    data = {
+        'bbox': [x0, y0, x1, y1],
+        'entities': [entity_to_json(entity) for entity in entities],
+    }
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+RENDERERS = {
+    'dxf': render_dxf,
+    'svg': render_svg,
+    'json': render_json,
+}
+
+
+def render(plan, fmt, executor=None, precision=None):
+    # Only the DXF renderer spreads work over an executor and has a compact mode
+    if fmt == 'dxf':
+        return render_dxf(plan, executor, precision)
+    return RENDERERS[fmt](plan)
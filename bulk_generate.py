@@ -0,0 +1,97 @@
+"""Generate many floor plans offline.
+
+Reads one plan spec per line (JSON objects using the same field names as the
+web form) from a file or stdin and writes each plan to OUTPUT_DIR under the
+ETag /generate sends for it (<spec key>.<format>, plus .p<precision> for
+compact output), spreading the work over several processes.
+
+    python bulk_generate.py specs.jsonl -o plans -j 8
+    cat specs.jsonl | python bulk_generate.py - -o plans -f dxf,svg
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import backends
+import floorplan
+
+
+def generate_one(job):
+    # Runs in a worker process; every failure is reported, never raised, so one
+    # bad spec does not take down the whole batch
+    line_no, line, output_dir, formats, precision, skip_existing = job
+    started = time.perf_counter()
+    result = {'line': line_no, 'files': {}}
+    try:
+        spec = floorplan.parse_spec(json.loads(line))
+        # Offline there is no server load, so 'auto' only goes by plan size
+        if spec['detail'] == 'auto':
+            spec['detail'] = floorplan.DETAIL_LEVELS[floorplan.auto_detail(spec['rooms'])]
+        for fmt in formats:
+            path = os.path.join(output_dir, floorplan.plan_etag(spec, fmt, precision))
+            if skip_existing and os.path.exists(path):
+                result['files'][path] = 'skipped'
+                continue
+            # The layout is computed for the first format and reused by the rest
+            data = floorplan.render(spec, fmt, precision=precision)
+            # Write under a temporary name first so an interrupted run never
+            # leaves a truncated file behind a valid name
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp_path, path)
+            result['files'][path] = len(data)
+    except Exception as exc:
+        result['error'] = f'{type(exc).__name__}: {exc}'
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def read_jobs(stream, output_dir, formats, precision, skip_existing):
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line_no, line, output_dir, formats, precision, skip_existing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate floor plans from a JSONL file of specs.')
+    parser.add_argument('specs', help="JSONL file with one plan spec per line, or '-' for stdin")
+    parser.add_argument('-o', '--output-dir', default='plans', help='directory for the generated files (default: plans)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='worker processes (default: one per CPU)')
+    parser.add_argument('-f', '--formats', default='dxf',
+                        help=f"comma separated output formats out of {', '.join(backends.RENDERERS)} (default: dxf)")
+    parser.add_argument('--precision', type=int, choices=range(9), metavar='0-8',
+                        help='write compact DXF with coordinates rounded to this many decimals')
+    parser.add_argument('--skip-existing', action='store_true', help='do not regenerate plans whose file already exists')
+    args = parser.parse_args(argv)
+    formats = args.formats.split(',')
+    unknown = [fmt for fmt in formats if fmt not in backends.RENDERERS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stream = sys.stdin if args.specs == '-' else open(args.specs, encoding='utf-8')
+
+    started = time.perf_counter()
+    done = failed = 0
+    with stream, multiprocessing.Pool(processes=max(1, args.jobs)) as pool:
+        jobs = read_jobs(stream, args.output_dir, formats, args.precision, args.skip_existing)
+        # One JSON report line per spec on stdout, in completion order
+        for result in pool.imap_unordered(generate_one, jobs):
+            print(json.dumps(result), flush=True)
+            done += 1
+            if 'error' in result:
+                failed += 1
+    elapsed = time.perf_counter() - started
+
+    rate = done / elapsed if elapsed else 0.0
+    print(f'{done} specs, {failed} failed, {elapsed:.2f}s ({rate:.1f} plans/s)', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
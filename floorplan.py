@@ -0,0 +1,1226 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import backends
+from footprint import SHAPES, Footprint, normalize_outline, parse_outline, shape_outline
+from labeling import FIXTURE, OPENING, ROOM_AREA, ROOM_NAME, Labels
+from planmodel import FloorPlan
+
+# Bump whenever a change alters the drawing produced for an unchanged spec, so
+# caches holding files under the old ETag stop matching
+GENERATOR_VERSION = '11'
+
+# Levels of detail, least first. 'outline' draws the walls, overall
+# dimensions and room names; 'walls' adds wall fill, doors, windows and the
+# room dimension chains; 'full' adds opening labels and dimensions, room
+# areas, the wall thickness note and fixtures.
+DETAIL_LEVELS = ('outline', 'walls', 'full')
+# Room counts above which the 'auto' level drops below a level
+DETAIL_MAX_ROOMS = {'full': 400, 'walls': 2000}
+
+# Number of computed plan models kept in memory, most recently used first out
+MODEL_CACHE_SIZE = 64
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+# Specs of recently issued plan ids, for region queries; remember_spec()
+# also keeps them in a shared directory for other processes, where files
+# unused for PLAN_SPEC_TTL seconds are removed
+PLAN_SPECS_SIZE = 256
+PLAN_SPEC_TTL = 86400
+PLAN_SPEC_PREFIX = 'plan-'
+PLAN_ID_PATTERN = re.compile('[0-9a-f]{64}')
+_plan_specs = OrderedDict()
+_plan_specs_lock = threading.Lock()
+
+# Per-room form field -> (room config key, default), the default of the room
+# name being 'Room <n>'
+ROOM_FIELDS = {
+    'room_name': ('name', None),
+    'room_doors': ('doors', 1),
+    'door_width': ('door_width', 0.9),
+    'room_windows': ('windows', 1),
+    'window_width': ('window_width', 1.2),
+}
+
+
+def default_room_config(number):
+    return {name: f'Room {number}' if default is None else default for name, default in ROOM_FIELDS.values()}
+
+
+def _number(values, name, default):
+    # NaN and infinity would pass float() and break the layout further down
+    value = float(values.get(name, default))
+    if not math.isfinite(value):
+        raise ValueError(f'{name} must be a finite number')
+    return value
+
+
+def parse_spec(values):
+    # `values` is any mapping with .get() - the request form, the query string
+    # or a decoded JSON object - using the field names of the HTML form
+    width = _number(values, 'width', 10.0)
+    length = _number(values, 'length', 10.0)
+    # A named shape drawn in width x length, or the corners of an orthogonal
+    # outline whose bounding box then sets width and length
+    footprint = values.get('footprint', 'rect')
+    if footprint not in SHAPES:
+        footprint = [list(point) for point in parse_outline(footprint)]
+        width = max(x for x, _ in footprint)
+        length = max(y for _, y in footprint)
+    elif width <= 0 or length <= 0:
+        raise ValueError('width and length must be positive')
+    else:
+        # Same checks as a custom outline, so a named shape too small to
+        # hold its rooms is refused here rather than failing in the layout
+        normalize_outline(shape_outline(footprint, width, length))
+    wall_thickness = _number(values, 'wall_thickness', 0.15)
+    rooms = int(values.get('rooms', 1))
+    
+    # Collect room configurations
+    room_configs = []
+    for i in range(1, rooms + 1):
+        room_name = values.get(f'room_name_{i}', f'Room {i}')
+        room_doors = int(values.get(f'room_doors_{i}', 1))
+        door_width = _number(values, f'door_width_{i}', 0.9)
+        room_windows = int(values.get(f'room_windows_{i}', 1))
+        window_width = _number(values, f'window_width_{i}', 1.2)
+        
+        room_configs.append({
+            'name': room_name,
+            'doors': room_doors,
+            'door_width': door_width,
+            'windows': room_windows,
+            'window_width': window_width,
+        })
+    
+    return {
+        'width': width,
+        'length': length,
+        'wall_thickness': wall_thickness,
+        'rooms': rooms,
+        'room_configs': room_configs,
+        'seed': int(values.get('seed', 0)),
+        'detail': values.get('detail', 'full'),
+        'footprint': footprint,
+    }
+
+
+def auto_detail(rooms, max_rooms=DETAIL_MAX_ROOMS):
+    # Index into DETAIL_LEVELS of the 'auto' level for a plan of this size
+    level = len(DETAIL_LEVELS) - 1
+    for limit_level, limit in max_rooms.items():
+        if rooms > limit:
+            level = min(level, DETAIL_LEVELS.index(limit_level) - 1)
+    return max(level, 0)
+
+
+def spec_key(spec, *extra):
+    # Stable digest of the normalized spec and the generator version, used as
+    # the strong ETag and as the name of the generated file
+    payload = json.dumps([GENERATOR_VERSION, spec, *extra], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def plan_etag(spec, fmt, precision=None):
+    # Names one file of a plan: the ETag of /generate and the file name of
+    # bulk_generate.py
+    etag = f'{spec_key(spec)}.{fmt}'
+    if precision is not None:
+        etag += f'.p{precision}'
+    return etag
+
+
+class DimensionChains:
+    # Continuous dimension chains, one per wall line and side. Openings and
+    # rooms that share a line share its extension points, so every distinct
+    # span on a line becomes exactly one DIMENSION instead of one per room or
+    # opening, and all of them sit on a common dimension line.
+    
+    def __init__(self, offset=0.3):
+        self.offset = offset
+        self.chains = {}
+    
+    def add(self, axis, line, start, end, dimtxt, base=None, points=(), side=-1):
+        # axis 'x': span start..end along x on the horizontal line y=line,
+        # axis 'y': span along y on the vertical line x=line. The chain goes
+        # to the side of the line given, 1 towards larger coordinates: outside
+        # the building on exterior walls, left of/below interior lines.
+        if base is None:
+            base = line + side * self.offset
+        key = (axis, round(line, 6), round(base, 6))
+        chain = self.chains.setdefault(key, {'dimtxt': dimtxt, 'spans': set(), 'points': set()})
+        chain['spans'].add((round(min(start, end), 6), round(max(start, end), 6)))
+        chain['points'].update(round(point, 6) for point in points)
+    
+    def segments(self, chain):
+        # Split the chain at every extension point and keep the pieces covered
+        # by a span, so gaps between openings stay undimensioned
+        spans = sorted(chain['spans'])
+        points = sorted(chain['points'].union(*spans))
+        span_index = 0
+        covered_to = None
+        for p, q in zip(points, points[1:]):
+            while span_index < len(spans) and spans[span_index][0] <= p:
+                if covered_to is None or spans[span_index][1] > covered_to:
+                    covered_to = spans[span_index][1]
+                span_index += 1
+            if covered_to is not None and q <= covered_to:
+                yield p, q
+    
+    def boxes(self):
+        # Strip along every dimension line, as wide as its text is high on
+        # either side, for keeping labels off the dimensions
+        for (axis, line, base), chain in self.chains.items():
+            pad = chain['dimtxt']
+            for p, q in self.segments(chain):
+                if axis == 'x':
+                    yield p, base - pad, q, base + pad
+                else:
+                    yield base - pad, p, base + pad, q
+    
+    def render(self, plan):
+        for (axis, line, base), chain in sorted(self.chains.items()):
+            override = {'dimtxt': chain['dimtxt']}
+            for p, q in self.segments(chain):
+                if axis == 'x':
+                    plan.add_linear_dim(base=(p, base), p1=(p, line), p2=(q, line), dimstyle='STANDARD', 
+                                       override=override, dxfattribs={'layer': 'DIMENSIONS'})
+                else:
+                    plan.add_linear_dim(base=(base, p), p1=(line, p), p2=(line, q), dimstyle='STANDARD', 
+                                       angle=90, override=override, dxfattribs={'layer': 'DIMENSIONS'})
+
+
+def build_model(spec):
+    width = spec['width']
+    length = spec['length']
+    wall_thickness = spec['wall_thickness']
+    rooms = spec['rooms']
+    room_configs = spec['room_configs']
+    
+    # Door and window offsets come from a generator seeded by the spec, so the
+    # same spec always produces the same drawing
+    rng = random.Random(spec['seed'])
+    
+    # Whole stages are left out below the full level of detail
+    if spec['detail'] not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown detail level {spec['detail']!r}, expected one of: {', '.join(DETAIL_LEVELS)}")
+    level = DETAIL_LEVELS.index(spec['detail'])
+    openings = level >= DETAIL_LEVELS.index('walls')
+    annotations = level >= DETAIL_LEVELS.index('full')
+    
+    plan = FloorPlan(width, length, wall_thickness, spec_key(spec))
+    
+    # Room and opening dimensions are collected here and drawn as chains at the
+    # end, once every extension point on a grid line is known
+    dimensions = DimensionChains()
+    # Labels are likewise collected and placed at the end, around the
+    # dimensions and each other
+    labels = Labels()
+    
+    footprint = spec['footprint']
+    if isinstance(footprint, str):
+        footprint = Footprint(shape_outline(footprint, width, length))
+    else:
+        footprint = Footprint(footprint)
+    
+    # Calculate room layout
+    if spec['footprint'] != 'rect':
+        # Rooms covering the footprint; a footprint made of more rectangles
+        # than requested rooms gets one default room per extra rectangle
+        cells = footprint.room_cells(rooms)
+        configs = room_configs + [default_room_config(i) for i in range(len(room_configs) + 1, len(cells) + 1)]
+        room_layout = [
+            {'x': x, 'y': y, 'width': w, 'length': l, 'exterior': exterior, 'config': config}
+            for (x, y, w, l, exterior), config in zip(cells, configs)
+        ]
+    elif rooms == 1:
+        # Simple single room
+        room_layout = [
+            {
+                'x': 0,
+                'y': 0,
+                'width': width,
+                'length': length,
+                'config': room_configs[0]
+            }
+        ]
+    elif rooms <= 3:
+        # Horizontal layout for 2-3 rooms
+        rooms_processed = []
+        current_y = 0
+        for i in range(rooms):
+            room_length = length / rooms
+            room = {
+                'x': 0,
+                'y': current_y,
+                'width': width,
+                'length': room_length,
+                'config': room_configs[i]
+            }
+            rooms_processed.append(room)
+            current_y += room_length
+        room_layout = rooms_processed
+    else:
+        # Grid layout for more rooms
+        rows = math.ceil(math.sqrt(rooms))
+        cols = math.ceil(rooms / rows)
+        
+        room_width = width / cols
+        room_length = length / rows
+        
+        rooms_processed = []
+        for row in range(rows):
+            for col in range(cols):
+                room_index = row * cols + col
+                if room_index < rooms:  # Don't create more rooms than requested
+                    room = {
+                        'x': col * room_width,
+                        'y': row * room_length,
+                        'width': room_width,
+                        'length': room_length,
+                        'config': room_configs[room_index]
+                    }
+                    rooms_processed.append(room)
+        room_layout = rooms_processed
+    
+    for room in room_layout:
+        # Room sides on the building's outline, where windows go and no
+        # interior wall is drawn
+        if 'exterior' not in room:
+            room['exterior'] = {
+                'left': room['x'] <= 0.01,
+                'top': room['y'] <= 0.01,
+                'right': room['x'] + room['width'] >= width - 0.01,
+                'bottom': room['y'] + room['length'] >= length - 0.01,
+            }
+        plan.add_room(room['config']['name'], room['x'], room['y'], room['width'], room['length'])
+    
+    # Draw outer walls with specified thickness (use double lines to represent thickness)
+    # Outer boundary
+    outer_boundary = footprint.outline + footprint.outline[:1]
+    plan.add_lwpolyline(outer_boundary, dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+    
+    # Inner boundary (to represent wall thickness), corner for corner
+    inner_boundary = footprint.inner_outline(wall_thickness)
+    inner_boundary.append(inner_boundary[0])
+    plan.add_lwpolyline(inner_boundary, dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+    
+    # Add wall fill patterns with hatch lines
+    if openings:
+        for i in range(len(outer_boundary) - 1):
+            x1, y1 = outer_boundary[i]
+            x2, y2 = outer_boundary[i + 1]
+            x3, y3 = inner_boundary[i]
+            x4, y4 = inner_boundary[i + 1]
+            
+            # Skip if this is just closing the loop
+            if i == len(outer_boundary) - 1:
+                continue
+                
+            # Create wall thickness polyline
+            wall_points = [(x1, y1), (x2, y2), (x4, y4), (x3, y3), (x1, y1)]
+            plan.add_lwpolyline(wall_points, dxfattribs={'layer': 'WALL_THICKNESS', 'lineweight': 15})
+    
+    # Add overall building dimensions
+    # Horizontal dimension at the top
+    plan.add_linear_dim(
+        base=(0, length + 0.5), 
+        p1=(0, length), 
+        p2=(width, length), 
+        dimstyle='STANDARD', 
+        override={'dimtxt': 0.25}, 
+        dxfattribs={'layer': 'DIMENSIONS'}
+    )
+    
+    # Vertical dimension at the right
+    plan.add_linear_dim(
+        base=(width + 0.5, 0), 
+        p1=(width, 0), 
+        p2=(width, length), 
+        dimstyle='STANDARD', 
+        angle=90, 
+        override={'dimtxt': 0.25}, 
+        dxfattribs={'layer': 'DIMENSIONS'}
+    )
+    
+    # Add wall thickness dimension
+    if annotations:
+        wall_dim_text = f"Wall Thickness: {wall_thickness}m"
+        wall_text = plan.add_text(wall_dim_text, dxfattribs={'layer': 'TEXT', 'height': 0.2})
+        wall_text.set_pos((width/2, length + 0.9), align='MIDDLE_CENTER')
+    
+        # Create a small wall thickness indicator
+        plan.add_line(
+            (width/2 - 0.5, length + 0.7),
+            (width/2 + 0.5, length + 0.7),
+            dxfattribs={'layer': 'DIMENSIONS'}
+        )
+        plan.add_line(
+            (width/2 - 0.5 + wall_thickness, length + 0.7 - wall_thickness),
+            (width/2 + 0.5 - wall_thickness, length + 0.7 - wall_thickness),
+            dxfattribs={'layer': 'DIMENSIONS'}
+        )
+        plan.add_line(
+            (width/2 - 0.5, length + 0.7),
+            (width/2 - 0.5 + wall_thickness, length + 0.7 - wall_thickness),
+            dxfattribs={'layer': 'DIMENSIONS'}
+        )
+        plan.add_line(
+            (width/2 + 0.5, length + 0.7),
+            (width/2 + 0.5 - wall_thickness, length + 0.7 - wall_thickness),
+            dxfattribs={'layer': 'DIMENSIONS'}
+        )
+    
+    for i, room in enumerate(room_layout):
+        # Add room name text
+        text_x = room['x'] + room['width'] / 2
+        text_y = room['y'] + room['length'] / 2
+        room_box = (room['x'] + wall_thickness, room['y'] + wall_thickness,
+                    room['x'] + room['width'] - wall_thickness, room['y'] + room['length'] - wall_thickness)
+        room_text = labels.add_text(room['config']['name'], dxfattribs={'layer': 'TEXT', 'height': min(room['width'], room['length']) / 10}, 
+                                    kind=ROOM_NAME, bounds=room_box)
+        room_text.set_pos((text_x, text_y), align='MIDDLE_CENTER')
+        
+        # Add room area text
+        if annotations:
+            area = room['width'] * room['length']
+            area_text = f"Area: {area:.2f}m²"
+            area_label = labels.add_text(area_text, dxfattribs={'layer': 'TEXT', 'height': min(room['width'], room['length']) / 15}, 
+                                         kind=ROOM_AREA, bounds=room_box)
+            area_label.set_pos((text_x, text_y - min(room['width'], room['length']) / 7), align='MIDDLE_CENTER')
+    
+    # Process each room to add walls, doors, and windows
+    for i, room in enumerate(room_layout):
+        x, y = room['x'], room['y']
+        w, l = room['width'], room['length']
+        config = room['config']
+        exterior = room['exterior']
+        
+        # Add interior walls for the room if it's not the outer boundary
+        if len(room_layout) > 1:
+            # Draw room walls based on position with double lines to show thickness
+            if not exterior['left']:  # Not leftmost room, draw left wall
+                # Outer line
+                plan.add_line((x, y), (x, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                # Inner line
+                plan.add_line((x + wall_thickness, y + wall_thickness), 
+                             (x + wall_thickness, y + l - wall_thickness), 
+                             dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+            
+            if not exterior['top']:  # Not topmost room, draw top wall
+                # Outer line
+                plan.add_line((x, y), (x + w, y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                # Inner line
+                plan.add_line((x + wall_thickness, y + wall_thickness), 
+                             (x + w - wall_thickness, y + wall_thickness), 
+                             dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+            
+            if not exterior['right']:  # Not rightmost room, draw right wall
+                # Outer line
+                plan.add_line((x + w, y), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                # Inner line
+                plan.add_line((x + w - wall_thickness, y + wall_thickness), 
+                             (x + w - wall_thickness, y + l - wall_thickness), 
+                             dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+            
+            if not exterior['bottom']:  # Not bottommost room, draw bottom wall
+                # Outer line
+                plan.add_line((x, y + l), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                # Inner line
+                plan.add_line((x + wall_thickness, y + l - wall_thickness), 
+                             (x + w - wall_thickness, y + l - wall_thickness), 
+                             dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+        
+        if not openings:
+            continue
+        
+        # Add doors with improved representation
+        door_positions = []
+        door_width = config['door_width']
+        
+        # Get available walls for this room
+        walls = []
+        if not exterior['left']:  # has left wall
+            walls.append('left')
+        if not exterior['top']:  # has top wall
+            walls.append('top')
+        if x + w < width or x + w >= width - 0.01:  # has right wall
+            walls.append('right')
+        if y + l < length or y + l >= length - 0.01:  # has bottom wall
+            walls.append('bottom')
+        
+        # Add requested number of doors
+        for d in range(min(config['doors'], len(walls))):
+            wall = walls[d % len(walls)]
+            
+            if wall == 'left':
+                door_x = x
+                door_y = y + l/2 - door_width/2 + rng.uniform(-l/4, l/4)
+                # Create door opening (no wall in door location)
+                # Draw wall segments around the door
+                if door_y > y:
+                    plan.add_line((x, y), (x, door_y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if door_y + door_width < y + l:
+                    plan.add_line((x, door_y + door_width), (x, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Add door arc symbol
+                center = (x - door_width/4, door_y + door_width/2)
+                radius = door_width/2
+                start_angle = 270
+                end_angle = 90
+                plan.add_arc(center=center, radius=radius, start_angle=start_angle, 
+                            end_angle=end_angle, dxfattribs={'layer': 'DOORS', 'lineweight': 30})
+                
+                # Add door line
+                door_line_x = x - door_width/4 + radius * math.cos(math.radians(270))
+                door_line_y = door_y + door_width/2 + radius * math.sin(math.radians(270))
+                plan.add_line(
+                    (door_line_x, door_line_y), 
+                    (x, door_y + door_width/2), 
+                    dxfattribs={'layer': 'DOORS', 'lineweight': 30}
+                )
+                
+                # Add door dimension
+                if annotations and door_y + door_width + 0.5 < y + l:
+                    dimensions.add('y', x, door_y, door_y + door_width, dimtxt=0.1)
+                    # Add door label
+                    door_label = f"D{i+1}-{d+1}"
+                    label = labels.add_text(door_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((x - 0.2, door_y + door_width/2), align='BOTTOM_CENTER')
+            
+            elif wall == 'top':
+                door_x = x + w/2 - door_width/2 + rng.uniform(-w/4, w/4)
+                door_y = y
+                # Create door opening (no wall in door location)
+                # Draw wall segments around the door
+                if door_x > x:
+                    plan.add_line((x, y), (door_x, y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if door_x + door_width < x + w:
+                    plan.add_line((door_x + door_width, y), (x + w, y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Add door arc symbol
+                center = (door_x + door_width/2, y - door_width/4)
+                radius = door_width/2
+                start_angle = 0
+                end_angle = 180
+                plan.add_arc(center=center, radius=radius, start_angle=start_angle, 
+                            end_angle=end_angle, dxfattribs={'layer': 'DOORS', 'lineweight': 30})
+                
+                # Add door line
+                door_line_x = door_x + door_width/2 + radius * math.cos(math.radians(0))
+                door_line_y = y - door_width/4 + radius * math.sin(math.radians(0))
+                plan.add_line(
+                    (door_line_x, door_line_y), 
+                    (door_x + door_width/2, y), 
+                    dxfattribs={'layer': 'DOORS', 'lineweight': 30}
+                )
+                
+                # Add door dimension
+                if annotations and door_x - 0.5 > x:
+                    dimensions.add('x', y, door_x, door_x + door_width, dimtxt=0.1)
+                    # Add door label
+                    door_label = f"D{i+1}-{d+1}"
+                    label = labels.add_text(door_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((door_x + door_width/2, y - 0.2), align='BOTTOM_CENTER')
+            
+            elif wall == 'right':
+                door_x = x + w
+                door_y = y + l/2 - door_width/2 + rng.uniform(-l/4, l/4)
+                # Create door opening (no wall in door location)
+                # Draw wall segments around the door
+                if door_y > y:
+                    plan.add_line((x + w, y), (x + w, door_y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if door_y + door_width < y + l:
+                    plan.add_line((x + w, door_y + door_width), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Add door arc symbol
+                center = (x + w + door_width/4, door_y + door_width/2)
+                radius = door_width/2
+                start_angle = 90
+                end_angle = 270
+                plan.add_arc(center=center, radius=radius, start_angle=start_angle, 
+                            end_angle=end_angle, dxfattribs={'layer': 'DOORS', 'lineweight': 30})
+                
+                # Add door line
+                door_line_x = x + w + door_width/4 + radius * math.cos(math.radians(90))
+                door_line_y = door_y + door_width/2 + radius * math.sin(math.radians(90))
+                plan.add_line(
+                    (door_line_x, door_line_y), 
+                    (x + w, door_y + door_width/2), 
+                    dxfattribs={'layer': 'DOORS', 'lineweight': 30}
+                )
+                
+                # Add door dimension
+                if annotations and door_y + door_width + 0.5 < y + l:
+                    dimensions.add('y', x + w, door_y, door_y + door_width, dimtxt=0.1,
+                                   side=1 if exterior['right'] else -1)
+                    # Add door label
+                    door_label = f"D{i+1}-{d+1}"
+                    label = labels.add_text(door_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((x + w + 0.2, door_y + door_width/2), align='LEFT')
+            
+            elif wall == 'bottom':
+                door_x = x + w/2 - door_width/2 + rng.uniform(-w/4, w/4)
+                door_y = y + l
+                # Create door opening (no wall in door location)
+                # Draw wall segments around the door
+                if door_x > x:
+                    plan.add_line((x, y + l), (door_x, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if door_x + door_width < x + w:
+                    plan.add_line((door_x + door_width, y + l), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Add door arc symbol
+                center = (door_x + door_width/2, y + l + door_width/4)
+                radius = door_width/2
+                start_angle = 180
+                end_angle = 0
+                plan.add_arc(center=center, radius=radius, start_angle=start_angle, 
+                            end_angle=end_angle, dxfattribs={'layer': 'DOORS', 'lineweight': 30})
+                
+                # Add door line
+                door_line_x = door_x + door_width/2 + radius * math.cos(math.radians(180))
+                door_line_y = y + l + door_width/4 + radius * math.sin(math.radians(180))
+                plan.add_line(
+                    (door_line_x, door_line_y), 
+                    (door_x + door_width/2, y + l), 
+                    dxfattribs={'layer': 'DOORS', 'lineweight': 30}
+                )
+                
+                # Add door dimension
+                if annotations and door_x - 0.5 > x:
+                    dimensions.add('x', y + l, door_x, door_x + door_width, dimtxt=0.1,
+                                   side=1 if exterior['bottom'] else -1)
+                    # Add door label
+                    door_label = f"D{i+1}-{d+1}"
+                    label = labels.add_text(door_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((door_x + door_width/2, y + l + 0.2), align='TOP_CENTER')
+        
+        # Add Windows with improved representation
+        window_positions = []
+        window_width = config['window_width']
+        
+        # Get exterior walls for this room (walls that are part of the outer boundary)
+        exterior_walls = [side for side in ('left', 'top', 'right', 'bottom') if exterior[side]]
+        
+        # Add requested number of windows on exterior walls
+        for w_idx in range(min(config['windows'], len(exterior_walls))):
+            wall = exterior_walls[w_idx % len(exterior_walls)]
+            
+            if wall == 'left':
+                window_x = x
+                window_y = y + rng.uniform(l*0.2, l*0.8) - window_width/2
+                
+                # Create window opening (break in wall)
+                if window_y > y:
+                    plan.add_line((x, y), (x, window_y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if window_y + window_width < y + l:
+                    plan.add_line((x, window_y + window_width), (x, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Inner wall line should also have a break
+                if window_y > y + wall_thickness:
+                    plan.add_line(
+                        (x + wall_thickness, y + wall_thickness), 
+                        (x + wall_thickness, window_y), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                if window_y + window_width < y + l - wall_thickness:
+                    plan.add_line(
+                        (x + wall_thickness, window_y + window_width), 
+                        (x + wall_thickness, y + l - wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                
+                # Window frame
+                plan.add_line(
+                    (x, window_y), 
+                    (x + wall_thickness, window_y), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                plan.add_line(
+                    (x, window_y + window_width), 
+                    (x + wall_thickness, window_y + window_width), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                
+                # Window glass (center line)
+                window_center_y = window_y + window_width/2
+                plan.add_line(
+                    (x, window_center_y), 
+                    (x + wall_thickness, window_center_y), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 15}
+                )
+                
+                # Add window dimension
+                if annotations and window_y + window_width + 0.5 < y + l:
+                    dimensions.add('y', x, window_y, window_y + window_width, dimtxt=0.1)
+                    # Add window label
+                    window_label = f"W{i+1}-{w_idx+1}"
+                    label = labels.add_text(window_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((x - 0.4, window_y + window_width/2), align='RIGHT')
+            
+            elif wall == 'top':
+                window_x = x + rng.uniform(room['width']*0.2, room['width']*0.8) - window_width/2
+                window_y = y
+                
+                # Create window opening (break in wall)
+                if window_x > x:
+                    plan.add_line((x, y), (window_x, y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if window_x + window_width < x + w:
+                    plan.add_line((window_x + window_width, y), (x + w, y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Inner wall line should also have a break
+                if window_x > x + wall_thickness:
+                    plan.add_line(
+                        (x + wall_thickness, y + wall_thickness), 
+                        (window_x, y + wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                if window_x + window_width < x + w - wall_thickness:
+                    plan.add_line(
+                        (window_x + window_width, y + wall_thickness), 
+                        (x + w - wall_thickness, y + wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                
+                # Window frame
+                plan.add_line(
+                    (window_x, y), 
+                    (window_x, y + wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                plan.add_line(
+                    (window_x + window_width, y), 
+                    (window_x + window_width, y + wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                
+                # Window glass (center line)
+                window_center_x = window_x + window_width/2
+                plan.add_line(
+                    (window_center_x, y), 
+                    (window_center_x, y + wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 15}
+                )
+                
+                # Add window dimension
+                if annotations and window_x - 0.5 > x:
+                    dimensions.add('x', y, window_x, window_x + window_width, dimtxt=0.1)
+                    # Add window label
+                    window_label = f"W{i+1}-{w_idx+1}"
+                    label = labels.add_text(window_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((window_x + window_width/2, y - 0.4), align='BOTTOM_CENTER')
+            
+            elif wall == 'right':
+                window_x = x + room['width']
+                window_y = y + rng.uniform(l*0.2, l*0.8) - window_width/2
+                
+                # Create window opening (break in wall)
+                if window_y > y:
+                    plan.add_line((x + w, y), (x + w, window_y), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if window_y + window_width < y + l:
+                    plan.add_line((x + w, window_y + window_width), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Inner wall line should also have a break
+                if window_y > y + wall_thickness:
+                    plan.add_line(
+                        (x + w - wall_thickness, y + wall_thickness), 
+                        (x + w - wall_thickness, window_y), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                if window_y + window_width < y + l - wall_thickness:
+                    plan.add_line(
+                        (x + w - wall_thickness, window_y + window_width), 
+                        (x + w - wall_thickness, y + l - wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                
+                # Window frame
+                plan.add_line(
+                    (x + w, window_y), 
+                    (x + w - wall_thickness, window_y), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                plan.add_line(
+                    (x + w, window_y + window_width), 
+                    (x + w - wall_thickness, window_y + window_width), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                
+                # Window glass (center line)
+                window_center_y = window_y + window_width/2
+                plan.add_line(
+                    (x + w, window_center_y), 
+                    (x + w - wall_thickness, window_center_y), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 15}
+                )
+                
+                # Add window dimension
+                if annotations and window_y + window_width + 0.5 < y + l:
+                    dimensions.add('y', x + w, window_y, window_y + window_width, dimtxt=0.1,
+                                   side=1 if exterior['right'] else -1)
+                    # Add window label
+                    window_label = f"W{i+1}-{w_idx+1}"
+                    label = labels.add_text(window_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((x + w + 0.4, window_y + window_width/2), align='LEFT')
+            
+            elif wall == 'bottom':
+                window_x = x + rng.uniform(room['width']*0.2, room['width']*0.8) - window_width/2
+                window_y = y + l
+                
+                # Create window opening (break in wall)
+                if window_x > x:
+                    plan.add_line((x, y + l), (window_x, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                if window_x + window_width < x + w:
+                    plan.add_line((window_x + window_width, y + l), (x + w, y + l), dxfattribs={'layer': 'WALLS', 'lineweight': 35})
+                
+                # Inner wall line should also have a break
+                if window_x > x + wall_thickness:
+                    plan.add_line(
+                        (x + wall_thickness, y + l - wall_thickness), 
+                        (window_x, y + l - wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                if window_x + window_width < x + w - wall_thickness:
+                    plan.add_line(
+                        (window_x + window_width, y + l - wall_thickness), 
+                        (x + w - wall_thickness, y + l - wall_thickness), 
+                        dxfattribs={'layer': 'WALLS', 'lineweight': 35}
+                    )
+                
+                # Window frame
+                plan.add_line(
+                    (window_x, y + l), 
+                    (window_x, y + l - wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                plan.add_line(
+                    (window_x + window_width, y + l), 
+                    (window_x + window_width, y + l - wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 25}
+                )
+                
+                # Window glass (center line)
+                window_center_x = window_x + window_width/2
+                plan.add_line(
+                    (window_center_x, y + l), 
+                    (window_center_x, y + l - wall_thickness), 
+                    dxfattribs={'layer': 'WINDOWS', 'lineweight': 15}
+                )
+                
+                # Add window dimension
+                if annotations and window_x - 0.5 > x:
+                    dimensions.add('x', y + l, window_x, window_x + window_width, dimtxt=0.1,
+                                   side=1 if exterior['bottom'] else -1)
+                    # Add window label
+                    window_label = f"W{i+1}-{w_idx+1}"
+                    label = labels.add_text(window_label, dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=OPENING)
+                    label.set_pos((window_x + window_width/2, y + l + 0.4), align='TOP_CENTER')
+
+    # Add room dimensions as one chain of column widths below the plan and one
+    # chain of row lengths left of it. A single room is already covered by the
+    # overall building dimensions.
+    column_edges = {edge for room in room_layout for edge in (room['x'], room['x'] + room['width'])}
+    row_edges = {edge for room in room_layout for edge in (room['y'], room['y'] + room['length'])}
+    if openings and len(column_edges) > 2:
+        dimensions.add('x', 0, 0, width, dimtxt=0.15, base=-0.6, points=column_edges)
+    if openings and len(row_edges) > 2:
+        dimensions.add('y', 0, 0, length, dimtxt=0.15, base=-0.6, points=row_edges)
+    
+    # Add dimensions
+    dimensions.render(plan)
+    
+    # Add some fixtures for common rooms, at full detail only
+    for room in room_layout if annotations else ():
+        x, y = room['x'], room['y']
+        w, l = room['width'], room['length']
+        name = room['config']['name'].lower()
+        room_box = (x + wall_thickness, y + wall_thickness, x + w - wall_thickness, y + l - wall_thickness)
+        
+        # Add fixtures based on room name
+        if 'bathroom' in name or 'bath' in name or 'wc' in name or 'toilet' in name:
+            # Add toilet, sink and bathtub
+            toilet_x, toilet_y = x + w * 0.75, y + l * 0.3
+            sink_x, sink_y = x + w * 0.25, y + l * 0.3
+            tub_x, tub_y = x + w * 0.5, y + l * 0.7
+            
+            # Toilet (rectangle with rounded top)
+            toilet_width, toilet_length = 0.4, 0.6
+            plan.add_lwpolyline([
+                (toilet_x - toilet_width/2, toilet_y - toilet_length/2),
+                (toilet_x + toilet_width/2, toilet_y - toilet_length/2),
+                (toilet_x + toilet_width/2, toilet_y + toilet_length/2),
+                (toilet_x - toilet_width/2, toilet_y + toilet_length/2),
+                (toilet_x - toilet_width/2, toilet_y - toilet_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add text label
+            toilet_label = labels.add_text("WC", dxfattribs={'layer': 'TEXT', 'height': 0.2}, kind=FIXTURE, bounds=room_box)
+            toilet_label.set_pos((toilet_x, toilet_y), align='MIDDLE_CENTER')
+            
+            # Sink (circle)
+            plan.add_circle((sink_x, sink_y), 0.3, dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add text label
+            sink_label = labels.add_text("SINK", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            sink_label.set_pos((sink_x, sink_y), align='MIDDLE_CENTER')
+            
+            # Bathtub (rectangle)
+            tub_width, tub_length = min(w * 0.7, 1.8), min(l * 0.3, 0.8)
+            plan.add_lwpolyline([
+                (tub_x - tub_width/2, tub_y - tub_length/2),
+                (tub_x + tub_width/2, tub_y - tub_length/2),
+                (tub_x + tub_width/2, tub_y + tub_length/2),
+                (tub_x - tub_width/2, tub_y + tub_length/2),
+                (tub_x - tub_width/2, tub_y - tub_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add text label
+            tub_label = labels.add_text("TUB", dxfattribs={'layer': 'TEXT', 'height': 0.2}, kind=FIXTURE, bounds=room_box)
+            tub_label.set_pos((tub_x, tub_y), align='MIDDLE_CENTER')
+            
+        elif 'kitchen' in name or 'dining' in name:
+            # Add kitchen counter, sink, stove and dining table
+            counter_x, counter_y = x + w * 0.8, y + l * 0.5
+            counter_width, counter_length = 0.6, w * 0.6
+            
+            # Kitchen counter (rectangle)
+            plan.add_lwpolyline([
+                (counter_x - counter_width/2, counter_y - counter_length/2),
+                (counter_x + counter_width/2, counter_y - counter_length/2),
+                (counter_x + counter_width/2, counter_y + counter_length/2),
+                (counter_x - counter_width/2, counter_y + counter_length/2),
+                (counter_x - counter_width/2, counter_y - counter_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add counter label
+            counter_label = labels.add_text("COUNTER", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            counter_label.set_pos((counter_x, counter_y), align='MIDDLE_CENTER')
+            
+            # Add sink in counter
+            sink_x, sink_y = counter_x - counter_width/4, counter_y
+            plan.add_circle((sink_x, sink_y), 0.2, dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add stove in counter
+            stove_x, stove_y = counter_x + counter_width/4, counter_y
+            stove_size = 0.3
+            plan.add_lwpolyline([
+                (stove_x - stove_size, stove_y - stove_size),
+                (stove_x + stove_size, stove_y - stove_size),
+                (stove_x + stove_size, stove_y + stove_size),
+                (stove_x - stove_size, stove_y + stove_size),
+                (stove_x - stove_size, stove_y - stove_size)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add smaller circles for burners
+            plan.add_circle((stove_x - stove_size/2, stove_y - stove_size/2), 0.05, dxfattribs={'layer': 'FIXTURES'})
+            plan.add_circle((stove_x + stove_size/2, stove_y - stove_size/2), 0.05, dxfattribs={'layer': 'FIXTURES'})
+            plan.add_circle((stove_x - stove_size/2, stove_y + stove_size/2), 0.05, dxfattribs={'layer': 'FIXTURES'})
+            plan.add_circle((stove_x + stove_size/2, stove_y + stove_size/2), 0.05, dxfattribs={'layer': 'FIXTURES'})
+            
+            # Dining table
+            table_x, table_y = x + w * 0.3, y + l * 0.5
+            table_width, table_length = min(w * 0.4, 1.2), min(l * 0.4, 1.2)
+            
+            # Table (rectangle)
+            plan.add_lwpolyline([
+                (table_x - table_width/2, table_y - table_length/2),
+                (table_x + table_width/2, table_y - table_length/2),
+                (table_x + table_width/2, table_y + table_length/2),
+                (table_x - table_width/2, table_y + table_length/2),
+                (table_x - table_width/2, table_y - table_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add table label
+            table_label = labels.add_text("TABLE", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            table_label.set_pos((table_x, table_y), align='MIDDLE_CENTER')
+            
+            # Add chairs (circles)
+            chair_positions = [
+                (table_x, table_y - table_length/2 - 0.2),  # Bottom
+                (table_x, table_y + table_length/2 + 0.2),  # Top
+                (table_x - table_width/2 - 0.2, table_y),   # Left
+                (table_x + table_width/2 + 0.2, table_y)    # Right
+            ]
+            for pos in chair_positions:
+                plan.add_circle(pos, 0.2, dxfattribs={'layer': 'FIXTURES'})
+            
+        elif 'bedroom' in name or 'bed' in name:
+            # Add bed, nightstand, and wardrobe
+            bed_x, bed_y = x + w * 0.6, y + l * 0.5
+            bed_width, bed_length = min(w * 0.7, 1.8), min(l * 0.5, 2.0)
+            
+            # Bed (rectangle)
+            plan.add_lwpolyline([
+                (bed_x - bed_width/2, bed_y - bed_length/2),
+                (bed_x + bed_width/2, bed_y - bed_length/2),
+                (bed_x + bed_width/2, bed_y + bed_length/2),
+                (bed_x - bed_width/2, bed_y + bed_length/2),
+                (bed_x - bed_width/2, bed_y - bed_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add bed label
+            bed_label = labels.add_text("BED", dxfattribs={'layer': 'TEXT', 'height': 0.25}, kind=FIXTURE, bounds=room_box)
+            bed_label.set_pos((bed_x, bed_y), align='MIDDLE_CENTER')
+            
+            # Add pillow
+            pillow_x, pillow_y = bed_x, bed_y - bed_length/2 + 0.3
+            pillow_width, pillow_length = bed_width * 0.8, 0.4
+            plan.add_lwpolyline([
+                (pillow_x - pillow_width/2, pillow_y - pillow_length/2),
+                (pillow_x + pillow_width/2, pillow_y - pillow_length/2),
+                (pillow_x + pillow_width/2, pillow_y + pillow_length/2),
+                (pillow_x - pillow_width/2, pillow_y + pillow_length/2),
+                (pillow_x - pillow_width/2, pillow_y - pillow_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add nightstand
+            nightstand_x, nightstand_y = bed_x - bed_width/2 - 0.3, bed_y - bed_length/2 + 0.3
+            nightstand_size = 0.4
+            plan.add_lwpolyline([
+                (nightstand_x - nightstand_size/2, nightstand_y - nightstand_size/2),
+                (nightstand_x + nightstand_size/2, nightstand_y - nightstand_size/2),
+                (nightstand_x + nightstand_size/2, nightstand_y + nightstand_size/2),
+                (nightstand_x - nightstand_size/2, nightstand_y + nightstand_size/2),
+                (nightstand_x - nightstand_size/2, nightstand_y - nightstand_size/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add wardrobe
+            wardrobe_x, wardrobe_y = x + w * 0.2, y + l * 0.2
+            wardrobe_width, wardrobe_length = 0.6, 1.5
+            plan.add_lwpolyline([
+                (wardrobe_x - wardrobe_width/2, wardrobe_y - wardrobe_length/2),
+                (wardrobe_x + wardrobe_width/2, wardrobe_y - wardrobe_length/2),
+                (wardrobe_x + wardrobe_width/2, wardrobe_y + wardrobe_length/2),
+                (wardrobe_x - wardrobe_width/2, wardrobe_y + wardrobe_length/2),
+                (wardrobe_x - wardrobe_width/2, wardrobe_y - wardrobe_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add wardrobe label
+            wardrobe_label = labels.add_text("WARDROBE", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            wardrobe_label.set_pos((wardrobe_x, wardrobe_y), align='MIDDLE_CENTER')
+            
+        elif 'living' in name or 'lounge' in name or 'family' in name:
+            # Add sofa, coffee table, TV and cabinet
+            sofa_x, sofa_y = x + w * 0.3, y + l * 0.8
+            sofa_width, sofa_length = min(w * 0.6, 2.5), min(l * 0.25, 1.0)
+            
+            # Sofa (rectangle with rounded corners)
+            plan.add_lwpolyline([
+                (sofa_x - sofa_width/2, sofa_y - sofa_length/2),
+                (sofa_x + sofa_width/2, sofa_y - sofa_length/2),
+                (sofa_x + sofa_width/2, sofa_y + sofa_length/2),
+                (sofa_x - sofa_width/2, sofa_y + sofa_length/2),
+                (sofa_x - sofa_width/2, sofa_y - sofa_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add sofa label
+            sofa_label = labels.add_text("SOFA", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            sofa_label.set_pos((sofa_x, sofa_y), align='MIDDLE_CENTER')
+            
+            # Coffee table (rectangle)
+            table_x, table_y = sofa_x, sofa_y - sofa_length - 0.5
+            table_width, table_length = sofa_width * 0.6, 0.6
+            plan.add_lwpolyline([
+                (table_x - table_width/2, table_y - table_length/2),
+                (table_x + table_width/2, table_y - table_length/2),
+                (table_x + table_width/2, table_y + table_length/2),
+                (table_x - table_width/2, table_y + table_length/2),
+                (table_x - table_width/2, table_y - table_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add table label
+            table_label = labels.add_text("TABLE", dxfattribs={'layer': 'TEXT', 'height': 0.1}, kind=FIXTURE, bounds=room_box)
+            table_label.set_pos((table_x, table_y), align='MIDDLE_CENTER')
+            
+            # TV cabinet
+            tv_x, tv_y = x + w * 0.7, y + l * 0.2
+            tv_width, tv_length = 1.2, 0.4
+            plan.add_lwpolyline([
+                (tv_x - tv_width/2, tv_y - tv_length/2),
+                (tv_x + tv_width/2, tv_y - tv_length/2),
+                (tv_x + tv_width/2, tv_y + tv_length/2),
+                (tv_x - tv_width/2, tv_y + tv_length/2),
+                (tv_x - tv_width/2, tv_y - tv_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # TV on the cabinet
+            tv_screen_width, tv_screen_depth = 0.8, 0.1
+            plan.add_lwpolyline([
+                (tv_x - tv_screen_width/2, tv_y - tv_length/2 - tv_screen_depth),
+                (tv_x + tv_screen_width/2, tv_y - tv_length/2 - tv_screen_depth),
+                (tv_x + tv_screen_width/2, tv_y - tv_length/2),
+                (tv_x - tv_screen_width/2, tv_y - tv_length/2),
+                (tv_x - tv_screen_width/2, tv_y - tv_length/2 - tv_screen_depth)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add TV label
+            tv_label = labels.add_text("TV", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            tv_label.set_pos((tv_x, tv_y), align='MIDDLE_CENTER')
+            
+        elif 'garage' in name:
+            # Add car outline and workbench
+            car_x, car_y = x + w * 0.5, y + l * 0.5
+            car_width, car_length = min(w * 0.8, 2.2), min(l * 0.8, 4.5)
+            
+            # Car outline (simplified rectangle)
+            plan.add_lwpolyline([
+                (car_x - car_width/2, car_y - car_length/2),
+                (car_x + car_width/2, car_y - car_length/2),
+                (car_x + car_width/2, car_y + car_length/2),
+                (car_x - car_width/2, car_y + car_length/2),
+                (car_x - car_width/2, car_y - car_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add car label
+            car_label = labels.add_text("CAR", dxfattribs={'layer': 'TEXT', 'height': 0.3}, kind=FIXTURE, bounds=room_box)
+            car_label.set_pos((car_x, car_y), align='MIDDLE_CENTER')
+            
+            # Add workbench along one wall
+            bench_x, bench_y = x + w * 0.8, y + l * 0.2
+            bench_width, bench_length = 0.6, w * 0.6
+            plan.add_lwpolyline([
+                (bench_x - bench_width/2, bench_y - bench_length/2),
+                (bench_x + bench_width/2, bench_y - bench_length/2),
+                (bench_x + bench_width/2, bench_y + bench_length/2),
+                (bench_x - bench_width/2, bench_y + bench_length/2),
+                (bench_x - bench_width/2, bench_y - bench_length/2)
+            ], dxfattribs={'layer': 'FIXTURES'})
+            
+            # Add workbench label
+            bench_label = labels.add_text("WORKBENCH", dxfattribs={'layer': 'TEXT', 'height': 0.15}, kind=FIXTURE, bounds=room_box)
+            bench_label.set_pos((bench_x, bench_y), align='MIDDLE_CENTER')
+
+    # Place all labels clear of the dimension lines and of each other
+    for box in dimensions.boxes():
+        labels.occupy(box)
+    labels.render(plan)
+    
+    # Add a scale and title at the bottom of the drawing
+    title_y = -1.5
+    scale_text = plan.add_text('SCALE 1:100', dxfattribs={'layer': 'TEXT', 'height': 0.3})
+    scale_text.set_pos((width / 2, title_y), align='MIDDLE_CENTER')
+    
+    title_text = plan.add_text('FLOOR PLAN', dxfattribs={'layer': 'TEXT', 'height': 0.4})
+    title_text.set_pos((width / 2, title_y - 0.8), align='MIDDLE_CENTER')
+
+    return plan
+
+
+def get_model(spec):
+    # Layout is computed once per spec and shared by all output formats
+    key = spec_key(spec)
+    with _model_cache_lock:
+        plan = _model_cache.get(key)
+        if plan is not None:
+            _model_cache.move_to_end(key)
+            return plan
+    
+    plan = build_model(spec)
+    with _model_cache_lock:
+        _model_cache[key] = plan
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return plan
+
+
+def render(spec, fmt='dxf', executor=None, precision=None):
+    return backends.render(get_model(spec), fmt, executor, precision)
+
+
+def spec_values(spec):
+    # The form values parse_spec() turns back into spec, leaving out room
+    # fields at their defaults
+    values = {name: spec[name] for name in ('width', 'length', 'wall_thickness', 'rooms', 'seed', 'detail', 'footprint')}
+    for i, config in enumerate(spec['room_configs'], 1):
+        defaults = default_room_config(i)
+        for field, (name, _) in ROOM_FIELDS.items():
+            if config[name] != defaults[name]:
+                values[f'{field}_{i}'] = config[name]
+    return values
+
+
+def plan_id(spec):
+    # The spec key: 64 characters for a plan of any size, so the id fits in a
+    # response header and a URL. remember_spec() keeps the spec behind it.
+    return spec_key(spec)
+
+
+def remember_spec(spec, directory=''):
+    # Keeps the spec under its plan id for region queries, in this process
+    # and, given a directory shared by all server processes, in a file there
+    # that any of them can read. Returns the plan id.
+    key = plan_id(spec)
+    with _plan_specs_lock:
+        _plan_specs[key] = spec
+        _plan_specs.move_to_end(key)
+        while len(_plan_specs) > PLAN_SPECS_SIZE:
+            _plan_specs.popitem(last=False)
+    if directory:
+        path = os.path.join(directory, f'{PLAN_SPEC_PREFIX}{key}.json')
+        try:
+            # Refreshed on every request, so an id in use never expires
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump([GENERATOR_VERSION, spec_values(spec)], fp, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            _prune_plan_specs(directory)
+    return key
+
+
+def lookup_spec(plan_id, directory=''):
+    # The spec of a remembered plan id, or None if this generator version
+    # never issued it or it has expired
+    if not PLAN_ID_PATTERN.fullmatch(plan_id):
+        return None
+    with _plan_specs_lock:
+        spec = _plan_specs.get(plan_id)
+    if spec is not None or not directory:
+        return spec
+    try:
+        with open(os.path.join(directory, f'{PLAN_SPEC_PREFIX}{plan_id}.json'), encoding='utf-8') as fp:
+            version, values = json.load(fp)
+        spec = parse_spec(values)
+    except (OSError, ValueError, TypeError):
+        return None
+    # The file name is only trusted once the spec hashes back to it
+    if version != GENERATOR_VERSION or spec_key(spec) != plan_id:
+        return None
+    with _plan_specs_lock:
+        _plan_specs[plan_id] = spec
+        while len(_plan_specs) > PLAN_SPECS_SIZE:
+            _plan_specs.popitem(last=False)
+    return spec
+
+
+def _prune_plan_specs(directory):
+    expired = time.time() - PLAN_SPEC_TTL
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith(PLAN_SPEC_PREFIX):
+                continue
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def render_view(spec, bbox, layers=None, fmt='json'):
+    # Only the entities inside bbox, found through the model's spatial index
+    entities = get_model(spec).spatial_index().query(bbox, layers)
+    return backends.render_view(entities, bbox, fmt)
+
+
+def generate_dxf(spec):
+    return render(spec, 'dxf')
@@ -0,0 +1,282 @@
+# Building footprints.
+#
+# A footprint is an orthogonal polygon - every edge horizontal or vertical -
+# given counter-clockwise in plan coordinates with its bounding box starting
+# at (0, 0). The outer wall line is the polygon itself, the inner wall line
+# its inward offset by the wall thickness (ezdxf.math), and rooms fill the
+# polygon completely.
+#
+# Rooms come from a decomposition into rectangles: a sweep over the vertex
+# coordinates keeps the sorted x coordinates of the vertical edges crossing
+# the sweep line, and only the intervals next to the horizontal edges met at
+# a stop change there. That gives O(n) rectangles in O(n log n) for n
+# vertices, each of which is then split into rooms. The same kind of sweep
+# checks that the outline does not cross or touch itself.
+import bisect
+import heapq
+import math
+
+from ezdxf.math import offset_vertices_2d
+
+# Named footprints, drawn in the width x length bounding box
+SHAPES = ('rect', 'L', 'T', 'U')
+
+# Smallest footprint area accepted, in square meters
+MIN_AREA = 1.0
+
+
+def shape_outline(shape, width, length):
+    w, l = width, length
+    if shape == 'rect':
+        return [(0, 0), (w, 0), (w, l), (0, l)]
+    if shape == 'L':
+        # Quarter at the far corner left out
+        return [(0, 0), (w, 0), (w, l / 2), (w / 2, l / 2), (w / 2, l), (0, l)]
+    if shape == 'T':
+        # Full-width wing on the far side, stem in the middle third
+        return [(w / 3, 0), (2 * w / 3, 0), (2 * w / 3, l / 2), (w, l / 2), (w, l), (0, l), (0, l / 2), (w / 3, l / 2)]
+    if shape == 'U':
+        # Courtyard cut into the middle third of the far side
+        return [(0, 0), (w, 0), (w, l), (2 * w / 3, l), (2 * w / 3, l / 2), (w / 3, l / 2), (w / 3, l), (0, l)]
+    raise ValueError(f"Unknown footprint {shape!r}, expected one of: {', '.join(SHAPES)} or a list of points")
+
+
+def parse_outline(value):
+    # 'x,y x,y ...' (or ';' separated) from a form, or a list of [x, y] pairs
+    # from JSON
+    if isinstance(value, str):
+        value = [point.split(',') for point in value.replace(';', ' ').split()]
+    try:
+        points = [(float(x), float(y)) for x, y in value]
+    except (TypeError, ValueError):
+        raise ValueError(f"Footprint must be one of: {', '.join(SHAPES)} or corner points 'x,y x,y ...'") from None
+    if not all(math.isfinite(x) and math.isfinite(y) for x, y in points):
+        raise ValueError('Footprint corners must be finite numbers')
+    return normalize_outline(points)
+
+
+def normalize_outline(points):
+    # Counter-clockwise, moved to start at (0, 0), without repeated or
+    # collinear vertices, so equal footprints give equal specs
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    if not points:
+        raise ValueError('A footprint needs at least 4 corners')
+    x0 = min(x for x, _ in points)
+    y0 = min(y for _, y in points)
+    points = [(x - x0, y - y0) for x, y in points]
+
+    cleaned = []
+    for point in points:
+        if cleaned and cleaned[-1] == point:
+            continue
+        cleaned.append(point)
+    if len(cleaned) > 1 and cleaned[0] == cleaned[-1]:
+        cleaned.pop()
+    points = cleaned
+    # Drop vertices in the middle of a straight edge
+    points = [p for i, p in enumerate(points)
+              if not _collinear(points[i - 1], p, points[(i + 1) % len(points)])]
+    if len(points) < 4:
+        raise ValueError('A footprint needs at least 4 corners')
+    for i, (x1, y1) in enumerate(points):
+        x2, y2 = points[(i + 1) % len(points)]
+        if x1 != x2 and y1 != y2:
+            raise ValueError(f'Footprint edge ({x1}, {y1}) - ({x2}, {y2}) is not horizontal or vertical')
+    _check_simple(points)
+
+    area = _signed_area(points)
+    if abs(area) < MIN_AREA:
+        raise ValueError(f'Footprint area {abs(area):g} is below the minimum of {MIN_AREA:g}')
+    if area < 0:
+        points.reverse()
+    # Start at the lowest, leftmost corner
+    start = points.index(min(points, key=lambda p: (p[1], p[0])))
+    return points[start:] + points[:start]
+
+
+def _collinear(a, b, c):
+    return (a[0] == b[0] == c[0]) or (a[1] == b[1] == c[1])
+
+
+def _signed_area(points):
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])) / 2
+
+
+def _edges(points):
+    # Horizontal edges as (y, x0, x1) and vertical edges as (x, y0, y1)
+    horizontal = []
+    vertical = []
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        if y1 == y2:
+            horizontal.append((y1, min(x1, x2), max(x1, x2)))
+        else:
+            vertical.append((x1, min(y1, y2), max(y1, y2)))
+    return horizontal, vertical
+
+
+def _check_simple(points):
+    # Raises ValueError unless the only points edges share are the corners
+    # between consecutive edges. Edges alternate between horizontal and
+    # vertical, so two parallel edges never share a corner, and a vertical
+    # edge meets exactly the two horizontal edges at its ends.
+    horizontal, vertical = _edges(points)
+    for edges in (horizontal, vertical):
+        edges = sorted(edges)
+        for (c1, lo1, hi1), (c2, lo2, hi2) in zip(edges, edges[1:]):
+            if c1 == c2 and lo2 <= hi1:
+                raise ValueError('Footprint outline touches or crosses itself')
+
+    # Sweep along x: horizontal edges are active from their first to their
+    # last x inclusive, and each vertical edge counts the active ones in its
+    # y range
+    events = []
+    for y, x0, x1 in horizontal:
+        events.append((x0, 0, y))
+        events.append((x1, 2, y))
+    for x, y0, y1 in vertical:
+        events.append((x, 1, (y0, y1)))
+    events.sort()
+    active = []
+    for _, kind, value in events:
+        if kind == 0:
+            bisect.insort(active, value)
+        elif kind == 2:
+            del active[bisect.bisect_left(active, value)]
+        else:
+            y0, y1 = value
+            if bisect.bisect_right(active, y1) - bisect.bisect_left(active, y0) != 2:
+                raise ValueError('Footprint outline touches or crosses itself')
+
+
+def _rectangles(points):
+    # Sweep bottom to top over the vertical edges. At each stop only the
+    # intervals touching a horizontal edge there change: they are closed
+    # before the vertical edges ending there are removed and opened again
+    # after the ones starting there are added.
+    horizontal, vertical = _edges(points)
+    spans = {}
+    for y, x0, x1 in horizontal:
+        spans.setdefault(y, []).append((x0, x1))
+    starts = {}
+    ends = {}
+    for x, y0, y1 in vertical:
+        starts.setdefault(y0, []).append(x)
+        ends.setdefault(y1, []).append(x)
+
+    active = []
+    open_since = {}
+    rectangles = []
+    for y in sorted(spans):
+        for x0, x1 in spans[y]:
+            for interval in _touching(active, x0, x1):
+                start = open_since.pop(interval, None)
+                if start is not None:
+                    rectangles.append((interval[0], start, interval[1], y))
+        for x in ends.get(y, ()):
+            del active[bisect.bisect_left(active, x)]
+        for x in starts.get(y, ()):
+            bisect.insort(active, x)
+        for x0, x1 in spans[y]:
+            for interval in _touching(active, x0, x1):
+                open_since.setdefault(interval, y)
+    return rectangles
+
+
+def _touching(active, x0, x1):
+    # Inside intervals (active[2k], active[2k + 1]) that touch [x0, x1]
+    first = bisect.bisect_left(active, x0) // 2
+    last = (bisect.bisect_right(active, x1) - 1) // 2
+    return [(active[2 * k], active[2 * k + 1]) for k in range(first, last + 1)]
+
+
+def _split(rectangle, count):
+    # count rooms filling the rectangle, as (x0, y0, x1, y1): rows of rooms
+    # about as tall as they are wide, the first rows taking one room more
+    # when count does not divide evenly
+    x0, y0, x1, y1 = rectangle
+    w, l = x1 - x0, y1 - y0
+    rows = max(1, min(count, round(math.sqrt(count * l / w))))
+    rooms = []
+    for row in range(rows):
+        ry0 = y0 + l * row / rows
+        ry1 = y0 + l * (row + 1) / rows if row < rows - 1 else y1
+        cols = count // rows + (1 if row < count % rows else 0)
+        for col in range(cols):
+            rx0 = x0 + w * col / cols
+            rx1 = x0 + w * (col + 1) / cols if col < cols - 1 else x1
+            rooms.append((rx0, ry0, rx1, ry1))
+    return rooms
+
+
+def _snap(value, coordinate, offset):
+    return min((coordinate - offset, coordinate + offset), key=lambda c: abs(c - value))
+
+
+class Footprint:
+
+    def __init__(self, outline):
+        self.outline = [tuple(p) for p in outline]
+        self.width = max(x for x, _ in self.outline)
+        self.length = max(y for _, y in self.outline)
+        self.area = _signed_area(self.outline)
+        horizontal, vertical = _edges(self.outline)
+        # Outline edges by coordinate, sorted, for telling exterior room sides
+        self._horizontal = {}
+        for y, x0, x1 in sorted(horizontal):
+            self._horizontal.setdefault(y, []).append((x0, x1))
+        self._vertical = {}
+        for x, y0, y1 in sorted(vertical):
+            self._vertical.setdefault(x, []).append((y0, y1))
+
+    def inner_outline(self, wall_thickness):
+        # The outline is counter-clockwise, so ezdxf's offset to the left is
+        # the inward one. Its corners come out of normalized direction
+        # vectors with noise such as 0.10000000000000002, so each coordinate
+        # is snapped to the corner coordinate plus or minus the wall
+        # thickness it stands for, the same float a rectangle always drew
+        # as wall_thickness or width - wall_thickness.
+        t = wall_thickness
+        inner = offset_vertices_2d(self.outline, t, closed=True)
+        return [(_snap(v.x, x, t), _snap(v.y, y, t)) for v, (x, y) in zip(inner, self.outline)]
+
+    def rectangles(self):
+        # Horizontal or vertical sweep, whichever needs fewer rectangles
+        by_rows = _rectangles(self.outline)
+        by_columns = [(x0, y0, x1, y1) for y0, x0, y1, x1 in _rectangles([(y, x) for x, y in self.outline])]
+        return min(by_rows, by_columns, key=len)
+
+    def room_cells(self, count):
+        # Rooms covering the footprint: every rectangle of the decomposition
+        # gets one room, so a footprint may need more than count, and the
+        # rest go to the rectangles with the most area per room. Returned
+        # as (x, y, width, length, exterior sides) row by row.
+        rectangles = sorted(self.rectangles(), key=lambda r: (r[1], r[0]))
+        counts = [1] * len(rectangles)
+        heap = [(-(x1 - x0) * (y1 - y0), i) for i, (x0, y0, x1, y1) in enumerate(rectangles)]
+        heapq.heapify(heap)
+        for _ in range(count - len(rectangles)):
+            _, i = heapq.heappop(heap)
+            counts[i] += 1
+            x0, y0, x1, y1 = rectangles[i]
+            heapq.heappush(heap, (-(x1 - x0) * (y1 - y0) / counts[i], i))
+
+        cells = []
+        for rectangle, rooms in zip(rectangles, counts):
+            for x0, y0, x1, y1 in _split(rectangle, rooms):
+                exterior = {
+                    'left': self._on_outline(self._vertical, x0, y0, y1),
+                    'top': self._on_outline(self._horizontal, y0, x0, x1),
+                    'right': self._on_outline(self._vertical, x1, y0, y1),
+                    'bottom': self._on_outline(self._horizontal, y1, x0, x1),
+                }
+                cells.append((x0, y0, x1 - x0, y1 - y0, exterior))
+        return cells
+
+    @staticmethod
+    def _on_outline(edges, coordinate, lo, hi):
+        # Whether the room side lo..hi at coordinate lies on one outline edge;
+        # sides only partly on the outline count as interior
+        spans = edges.get(coordinate, ())
+        i = bisect.bisect_right(spans, (lo, math.inf)) - 1
+        return i >= 0 and spans[i][0] <= lo and hi <= spans[i][1]
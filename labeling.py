@@ -0,0 +1,188 @@
+# Label placement for floor plans.
+#
+# Layout code records its labels here instead of adding TEXT entities right
+# away. Once the plan's dimensions are known, the labels are placed in order
+# of importance: each one tries its preferred spot, then nearby spots and
+# smaller sizes, and takes the first whose box is free in a grid of occupied
+# boxes. The placed labels are then added to the plan in one batch.
+import functools
+
+from ezdxf.tools import fonts
+
+# Label kinds in placement order - earlier kinds get the preferred spots
+ROOM_NAME = 0
+ROOM_AREA = 1
+FIXTURE = 2
+OPENING = 3
+
+# Positions tried around the preferred one, in steps of the label's width
+# (x) and 1.5 times its height (y)
+CANDIDATE_OFFSETS = (
+    (0, 0), (0, 1), (0, -1), (1, 0), (-1, 0), (0, 2), (0, -2),
+    (1, 1), (-1, 1), (1, -1), (-1, -1),
+)
+# Sizes tried at each position before moving on, relative to the requested
+# height
+CANDIDATE_SCALES = (1.0, 0.8, 0.6)
+
+# Boxes touching more occupancy grid cells than this, like the dimension
+# strip along a long wall, go to a short list checked on every test
+MAX_BOX_CELLS = 256
+
+# Font of the STANDARD text style the DXF output uses
+STYLE_FONT = fonts.map_shx_to_ttf('txt')
+
+
+# Label heights follow room sizes, so a long-running server sees an
+# unbounded number of them; only the recently used fonts are kept
+@functools.lru_cache(maxsize=1024)
+def _font(height):
+    return fonts.make_font(STYLE_FONT, height)
+
+
+@functools.lru_cache(maxsize=65536)
+def text_width(text, height):
+    # Measured once per string and height; plans repeat the same few labels
+    # (D1-1, SINK, BED, ...) many times
+    return _font(height).text_width(text)
+
+
+def text_box(text, height, insert, align):
+    # (x0, y0, x1, y1) covered by a TEXT entity with this alignment
+    width = text_width(text, height)
+    x, y = insert
+    vertical, _, horizontal = align.rpartition('_')
+    if not vertical and horizontal == 'MIDDLE':
+        vertical = 'MIDDLE'
+    if horizontal in ('CENTER', 'MIDDLE'):
+        x -= width / 2
+    elif horizontal == 'RIGHT':
+        x -= width
+    if vertical == 'MIDDLE':
+        y -= height / 2
+    elif vertical == 'TOP':
+        y -= height
+    return x, y, x + width, y + height
+
+
+def _inside(box, bounds):
+    return bounds[0] <= box[0] and bounds[1] <= box[1] and box[2] <= bounds[2] and box[3] <= bounds[3]
+
+
+class OccupancyGrid:
+    # Boxes filed under every grid cell they touch; a collision test only
+    # looks at the boxes in the cells under the tested box. Cells are sized
+    # like the labels, so the work follows the number of labels, not the
+    # drawing's area.
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.large = []
+
+    def _range(self, box):
+        size = self.cell_size
+        return (range(int(box[0] // size), int(box[2] // size) + 1),
+                range(int(box[1] // size), int(box[3] // size) + 1))
+
+    def add(self, box):
+        columns, rows = self._range(box)
+        if len(columns) * len(rows) > MAX_BOX_CELLS:
+            self.large.append(box)
+            return
+        cells = self.cells
+        for column in columns:
+            for row in rows:
+                cell = cells.get((column, row))
+                if cell is None:
+                    cells[column, row] = [box]
+                else:
+                    cell.append(box)
+
+    def collides(self, box):
+        x0, y0, x1, y1 = box
+        columns, rows = self._range(box)
+        cells = self.cells
+        for column in columns:
+            for row in rows:
+                for bx0, by0, bx1, by1 in cells.get((column, row), ()):
+                    # Boxes that only touch do not collide
+                    if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                        return True
+        for bx0, by0, bx1, by1 in self.large:
+            if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                return True
+        return False
+
+
+class Label:
+    __slots__ = ('text', 'dxfattribs', 'kind', 'bounds', 'insert', 'align')
+
+    def __init__(self, text, dxfattribs, kind, bounds):
+        self.text = text
+        self.dxfattribs = dxfattribs
+        self.kind = kind
+        self.bounds = bounds
+        self.insert = (0.0, 0.0)
+        self.align = 'LEFT'
+
+    def set_pos(self, p, align='LEFT'):
+        self.insert = (float(p[0]), float(p[1]))
+        self.align = align
+        return self
+
+
+class Labels:
+    # Mirrors plan.add_text(...).set_pos(...), so layout code records a label
+    # exactly as it would draw one
+
+    def __init__(self):
+        self.labels = []
+        self.reserved = []
+        self.grid = None
+
+    def add_text(self, text, dxfattribs, kind=FIXTURE, bounds=None):
+        # bounds (x0, y0, x1, y1) keeps a label inside its room when it moves
+        label = Label(text, dict(dxfattribs), kind, bounds)
+        self.labels.append(label)
+        return label
+
+    def occupy(self, box):
+        # Reserve a box no label may cover, e.g. a dimension line
+        self.reserved.append(box)
+
+    def place(self, label):
+        height = label.dxfattribs['height']
+        for scale in CANDIDATE_SCALES:
+            scaled = height * scale
+            step_x = text_width(label.text, scaled)
+            step_y = scaled * 1.5
+            for dx, dy in CANDIDATE_OFFSETS:
+                insert = (label.insert[0] + dx * step_x, label.insert[1] + dy * step_y)
+                box = text_box(label.text, scaled, insert, label.align)
+                if label.bounds is not None and not _inside(box, label.bounds):
+                    continue
+                if not self.grid.collides(box):
+                    return insert, scaled, box
+        # Nowhere free - keep the preferred spot rather than lose the label
+        return label.insert, height, text_box(label.text, height, label.insert, label.align)
+
+    def render(self, plan):
+        # Grid cells about as large as an average label at its preferred size
+        edges = [max(x1 - x0, y1 - y0) for x0, y0, x1, y1 in (
+            text_box(label.text, label.dxfattribs['height'], label.insert, label.align) for label in self.labels)]
+        self.grid = OccupancyGrid((sum(edges) / len(edges) if edges else 0.0) or 1.0)
+        for box in self.reserved:
+            self.grid.add(box)
+
+        placed = {}
+        for index in sorted(range(len(self.labels)), key=lambda i: (self.labels[i].kind, i)):
+            insert, height, box = self.place(self.labels[index])
+            self.grid.add(box)
+            placed[index] = insert, height
+        # Emitted in recording order, so the drawing order does not depend on
+        # which labels had to move
+        for index, label in enumerate(self.labels):
+            insert, height = placed[index]
+            dxfattribs = dict(label.dxfattribs, height=height)
+            plan.add_text(label.text, dxfattribs=dxfattribs).set_pos(insert, align=label.align)
@@ -0,0 +1,154 @@
+"""Load test a running CadCrafter instance.
+
+Replays a reproducible mix of plan sizes against /generate at a target request
+rate with bounded concurrency, checks that every response is a DXF file for
+the plan that was requested, and reports latency percentiles, throughput,
+error rate and response sizes.
+
+    python app.py &
+    python loadtest.py --rate 20 --concurrency 8 --requests 500 --mix 1:4,4:3,16:2,49:1
+"""
+import argparse
+import io
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import ezdxf
+
+
+def parse_mix(text):
+    # "rooms:weight,..." -> ([rooms, ...], [weight, ...])
+    sizes, weights = [], []
+    for item in text.split(','):
+        rooms, _, weight = item.partition(':')
+        sizes.append(int(rooms))
+        weights.append(float(weight or 1))
+    return sizes, weights
+
+
+def make_form(n, rooms, rng, compact=False):
+    # Building size grows with the room count so rooms keep a sensible size.
+    # The first room is named after the request so the response can be
+    # checked against the plan that was actually asked for.
+    side = round(max(6.0, 4.0 * math.sqrt(rooms)), 1)
+    return {
+        'width': side,
+        'length': side,
+        'rooms': rooms,
+        'seed': rng.randrange(1 << 30),
+        'room_name_1': f'LOADTEST-{n}',
+        'compact': int(compact),
+    }
+
+
+def verify_dxf(body, form):
+    doc = ezdxf.read(io.StringIO(body.decode('utf-8')))
+    names = {e.dxf.text for e in doc.modelspace().query('TEXT')}
+    if form['room_name_1'] not in names:
+        raise ValueError(f"response does not contain room {form['room_name_1']!r}")
+
+
+def run_request(url, n, form, scheduled, verify, timeout):
+    data = urllib.parse.urlencode(form).encode('ascii')
+    result = {'n': n, 'rooms': form['rooms'], 'bytes': 0, 'error': None}
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=timeout) as response:
+            body = response.read()
+        result['bytes'] = len(body)
+        # Latency is measured from the scheduled start, so time spent waiting
+        # for a free connection counts against the server as well
+        result['latency'] = time.perf_counter() - scheduled
+        if verify:
+            verify_dxf(body, form)
+    except urllib.error.HTTPError as exc:
+        result['error'] = f'HTTP {exc.code}'
+    except Exception as exc:
+        result['error'] = f'{type(exc).__name__}: {exc}'
+    result.setdefault('latency', time.perf_counter() - scheduled)
+    return result
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(results, elapsed, out=sys.stdout):
+    ok = [r for r in results if r['error'] is None]
+    latencies = [r['latency'] for r in ok]
+    sizes = [r['bytes'] for r in ok]
+    errors = len(results) - len(ok)
+
+    print(f'requests:    {len(results)} in {elapsed:.2f}s', file=out)
+    print(f'throughput:  {len(ok) / elapsed if elapsed else 0.0:.2f} ok/s', file=out)
+    print(f'error rate:  {errors / len(results) * 100 if results else 0.0:.2f}% ({errors})', file=out)
+    print('latency ms:  p50 {:.1f}  p95 {:.1f}  p99 {:.1f}  max {:.1f}'.format(
+        *(percentile(latencies, p) * 1000 for p in (50, 95, 99, 100))), file=out)
+    if sizes:
+        print(f'size bytes:  mean {sum(sizes) / len(sizes):.0f}  max {max(sizes)}', file=out)
+
+    # Per plan size, because large plans dominate the tail
+    for rooms in sorted({r['rooms'] for r in results}):
+        group = [r for r in results if r['rooms'] == rooms]
+        group_ok = [r['latency'] for r in group if r['error'] is None]
+        print(f'  rooms={rooms:<4} n={len(group):<5} errors={len(group) - len(group_ok):<4} '
+              f'p50 {percentile(group_ok, 50) * 1000:.1f}ms  p99 {percentile(group_ok, 99) * 1000:.1f}ms', file=out)
+
+    first_errors = sorted({r['error'] for r in results if r['error']})[:5]
+    for error in first_errors:
+        print(f'  error: {error}', file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the /generate endpoint.')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/generate', help='generate endpoint to test')
+    parser.add_argument('--rate', type=float, default=10.0, help='target requests per second (default: 10)')
+    parser.add_argument('--concurrency', type=int, default=4, help='maximum requests in flight (default: 4)')
+    parser.add_argument('--requests', type=int, default=200, help='number of requests to send (default: 200)')
+    parser.add_argument('--mix', default='1:4,4:3,16:2,49:1', help='plan sizes as rooms:weight pairs (default: 1:4,4:3,16:2,49:1)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the request mix, same seed replays the same requests')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request timeout in seconds')
+    parser.add_argument('--compact', action='store_true', help='request compact DXF output')
+    parser.add_argument('--no-verify', action='store_true', help='skip parsing the returned DXF files')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sizes, weights = parse_mix(args.mix)
+    forms = [make_form(n, rng.choices(sizes, weights)[0], rng, args.compact) for n in range(args.requests)]
+
+    results = []
+    lock = threading.Lock()
+
+    def collect(future):
+        with lock:
+            results.append(future.result())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # Open loop: requests are issued on schedule whether or not earlier
+        # ones have finished, queueing when all connections are busy
+        for n, form in enumerate(forms):
+            scheduled = started + n / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            future = pool.submit(run_request, args.url, n, form, scheduled, not args.no_verify, args.timeout)
+            future.add_done_callback(collect)
+    elapsed = time.perf_counter() - started
+
+    report(results, elapsed)
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
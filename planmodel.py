@@ -0,0 +1,198 @@
+# Intermediate floor plan model.
+#
+# The layout code records every element of a plan here once, and the render
+# backends (DXF, SVG, JSON) turn the same model into their format. The
+# recording methods mirror the subset of ezdxf's modelspace API the layout
+# uses, so layout code reads exactly as if it drew into a DXF document.
+
+from spatialindex import GridIndex
+
+# Layer name -> AutoCAD color index
+LAYERS = {
+    'WALLS': 5,  # Blue
+    'DOORS': 1,  # Red
+    'WINDOWS': 3,  # Green
+    'FIXTURES': 4,  # Cyan
+    'DIMENSIONS': 7,  # White
+    'TEXT': 2,  # Yellow
+    'WALL_THICKNESS': 6,  # Magenta
+}
+
+
+def _point(p):
+    return (float(p[0]), float(p[1]))
+
+
+class Room:
+    __slots__ = ('name', 'x', 'y', 'width', 'length')
+
+    def __init__(self, name, x, y, width, length):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.length = length
+
+
+class Line:
+    __slots__ = ('layer', 'lineweight', 'start', 'end')
+    dxftype = 'LINE'
+
+    def __init__(self, layer, lineweight, start, end):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.start = start
+        self.end = end
+
+    def points(self):
+        return (self.start, self.end)
+
+
+class Polyline:
+    __slots__ = ('layer', 'lineweight', 'vertices')
+    dxftype = 'LWPOLYLINE'
+
+    def __init__(self, layer, lineweight, vertices):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.vertices = vertices
+
+    def points(self):
+        return self.vertices
+
+
+class Arc:
+    __slots__ = ('layer', 'lineweight', 'center', 'radius', 'start_angle', 'end_angle')
+    dxftype = 'ARC'
+
+    def __init__(self, layer, lineweight, center, radius, start_angle, end_angle):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.center = center
+        self.radius = radius
+        self.start_angle = start_angle
+        self.end_angle = end_angle
+
+    def points(self):
+        # Extents of the full circle, close enough for a door swing
+        cx, cy = self.center
+        r = self.radius
+        return ((cx - r, cy - r), (cx + r, cy + r))
+
+
+class Circle:
+    __slots__ = ('layer', 'lineweight', 'center', 'radius')
+    dxftype = 'CIRCLE'
+
+    def __init__(self, layer, lineweight, center, radius):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.center = center
+        self.radius = radius
+
+    def points(self):
+        cx, cy = self.center
+        r = self.radius
+        return ((cx - r, cy - r), (cx + r, cy + r))
+
+
+class Text:
+    __slots__ = ('layer', 'lineweight', 'text', 'height', 'insert', 'align')
+    dxftype = 'TEXT'
+
+    def __init__(self, layer, lineweight, text, height):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.text = text
+        self.height = height
+        self.insert = (0.0, 0.0)
+        self.align = 'LEFT'
+
+    def set_pos(self, p, align='LEFT'):
+        self.insert = _point(p)
+        self.align = align
+        return self
+
+    def points(self):
+        return (self.insert,)
+
+
+class Dimension:
+    __slots__ = ('layer', 'lineweight', 'base', 'p1', 'p2', 'angle', 'dimstyle', 'dimtxt')
+    dxftype = 'DIMENSION'
+
+    def __init__(self, layer, lineweight, base, p1, p2, angle, dimstyle, dimtxt):
+        self.layer = layer
+        self.lineweight = lineweight
+        self.base = base
+        self.p1 = p1
+        self.p2 = p2
+        self.angle = angle
+        self.dimstyle = dimstyle
+        self.dimtxt = dimtxt
+
+    def points(self):
+        return (self.base, self.p1, self.p2)
+
+
+class FloorPlan:
+    # Everything needed to render one plan, computed once per spec. Entities
+    # keep their creation order, which is also their drawing order.
+
+    def __init__(self, width, length, wall_thickness, key):
+        self.width = width
+        self.length = length
+        self.wall_thickness = wall_thickness
+        # Spec key, from which the DXF header's GUIDs are derived
+        self.key = key
+        self.rooms = []
+        self.entities = []
+        self._index = None
+
+    def add_room(self, name, x, y, width, length):
+        room = Room(name, x, y, width, length)
+        self.rooms.append(room)
+        return room
+
+    def _add(self, entity):
+        self.entities.append(entity)
+        return entity
+
+    def add_line(self, start, end, dxfattribs):
+        return self._add(Line(dxfattribs['layer'], dxfattribs.get('lineweight'), _point(start), _point(end)))
+
+    def add_lwpolyline(self, points, dxfattribs):
+        vertices = tuple(_point(p) for p in points)
+        return self._add(Polyline(dxfattribs['layer'], dxfattribs.get('lineweight'), vertices))
+
+    def add_arc(self, center, radius, start_angle, end_angle, dxfattribs):
+        return self._add(Arc(dxfattribs['layer'], dxfattribs.get('lineweight'), _point(center),
+                             float(radius), float(start_angle), float(end_angle)))
+
+    def add_circle(self, center, radius, dxfattribs):
+        return self._add(Circle(dxfattribs['layer'], dxfattribs.get('lineweight'), _point(center), float(radius)))
+
+    def add_text(self, text, dxfattribs):
+        return self._add(Text(dxfattribs['layer'], dxfattribs.get('lineweight'), text, float(dxfattribs['height'])))
+
+    def add_linear_dim(self, base, p1, p2, dimstyle, override, dxfattribs, angle=0):
+        return self._add(Dimension(dxfattribs['layer'], dxfattribs.get('lineweight'), _point(base), _point(p1),
+                                   _point(p2), float(angle), dimstyle, float(override['dimtxt'])))
+
+    def extents(self):
+        xs = []
+        ys = []
+        for entity in self.entities:
+            for x, y in entity.points():
+                xs.append(x)
+                ys.append(y)
+        if not xs:
+            return (0.0, 0.0), (self.width, self.length)
+        return (min(xs), min(ys)), (max(xs), max(ys))
+
+    def spatial_index(self):
+        # Built on the first region query and kept with the model, which is
+        # complete by then
+        if self._index is None:
+            self._index = GridIndex(self.entities)
+        return self._index
@@ -0,0 +1,99 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+def profile_pstats(func, limit=60):
+    # Deterministic profile of every call, sorted by cumulative time
+    profiler = cProfile.Profile()
+    profiler.runcall(func)
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(limit)
+    stats.sort_stats('tottime').print_stats(limit)
+    return out.getvalue()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    # ';' separates frames in the collapsed format and ' ' ends the stack
+    filename = os.path.basename(code.co_filename).replace(' ', '_')
+    return f'{code.co_name}({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def profile_collapsed(func, interval=0.001):
+    # Sampling profile in the collapsed stack format understood by
+    # flamegraph.pl, speedscope and inferno: "root;caller;callee count"
+    target = threading.get_ident()
+    # Stacks stop at this frame, leaving out the web framework above it
+    root = sys._getframe()
+    samples = Counter()
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None and frame is not root:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                samples[';'.join(reversed(stack))] += 1
+
+    sampler = threading.Thread(target=sample, name='profile-sampler', daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(samples.items()))
+
+
+def profile_tracemalloc(func, limit=30, frames=25):
+    # Top allocation sites that are still alive when func returns, plus the
+    # peak traced memory during the call
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(frames)
+    try:
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    del result
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    out = io.StringIO()
+    print(f'elapsed {elapsed:.3f}s, traced current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB', file=out)
+    print(f'\nTop {limit} allocation sites by line:', file=out)
+    for stat in snapshot.statistics('lineno')[:limit]:
+        print(stat, file=out)
+    print(f'\nTop {min(limit, 10)} allocation tracebacks:', file=out)
+    for stat in snapshot.statistics('traceback')[:min(limit, 10)]:
+        print(f'\n{stat.count} blocks, {stat.size / 1024:.1f} KiB', file=out)
+        for line in stat.traceback.format(most_recent_first=True):
+            print(line, file=out)
+    return out.getvalue()
+
+
+PROFILERS = {
+    'pstats': profile_pstats,
+    'collapsed': profile_collapsed,
+    'tracemalloc': profile_tracemalloc,
+}
@@ -0,0 +1,116 @@
+# Coalescing of identical concurrent generations.
+#
+# Plans are deterministic, so when several requests for the same plan arrive
+# together only the first needs to generate it; the others wait and are
+# handed the same bytes. SingleFlight does this for the threads of one
+# process. shared_call() extends it to all processes on the machine through
+# a lock file and a result file per key in a shared directory.
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows - cross-process coalescing is not available
+    fcntl = None
+
+# Seconds a result file is kept for processes that were waiting on its
+# generation; older ones are removed by the next generation
+RESULT_TTL = 300
+# Prefix of every file shared_call() creates, the only files it removes
+FILE_PREFIX = 'cadcrafter-'
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args):
+        # Runs func(*args) unless a call for key is already running, in which
+        # case waits for that call and returns (or raises) its outcome
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def available():
+    return fcntl is not None
+
+
+def shared_call(directory, key, func, *args):
+    # Like SingleFlight.do across processes: whoever holds the key's lock file
+    # generates and leaves the bytes in a result file; the others block on the
+    # lock and then read that file. func must return bytes.
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, FILE_PREFIX + key)
+    result = _read(path)
+    if result is not None:
+        return result
+
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            result = _read(path)
+            if result is None:
+                result = func(*args)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as fp:
+                    fp.write(result)
+                os.replace(tmp_path, path)
+                _prune(directory)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return result
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as fp:
+            return fp.read()
+    except FileNotFoundError:
+        return None
+
+
+def _prune(directory):
+    # Lock files are removed too; a process still queued on a removed lock
+    # file may generate once more, which only costs time since plans are
+    # deterministic
+    expired = time.time() - RESULT_TTL
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith(FILE_PREFIX):
+                continue
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
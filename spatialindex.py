@@ -0,0 +1,96 @@
+# Uniform grid index over the entities of a floor plan, for viewport queries.
+#
+# Every entity is filed under the grid cells its bounding box touches, so a
+# query only visits the cells under the requested box and its cost follows
+# what is visible there, not the size of the plan. Entities spanning a large
+# part of the plan (outer walls, overall dimensions) are kept in a short
+# separate list instead of being copied into hundreds of cells.
+import math
+
+# Average number of entities per cell the grid is sized for
+CELL_OCCUPANCY = 8
+# Entities touching more cells than this go to the shared list
+MAX_ENTITY_CELLS = 64
+
+# Rough advance width of one character as a fraction of the text height, used
+# to give TEXT entities an extent around their insertion point
+CHAR_WIDTH = 0.8
+
+
+def entity_bbox(entity):
+    xs, ys = zip(*entity.points())
+    x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+    # Text and dimension labels reach beyond their points; the box only has
+    # to be large enough, a slightly generous one costs nothing but a filter
+    if entity.dxftype == 'TEXT':
+        pad = len(entity.text) * entity.height * CHAR_WIDTH
+        return x0 - pad, y0 - entity.height, x1 + pad, y1 + entity.height
+    if entity.dxftype == 'DIMENSION':
+        pad = entity.dimtxt * 2
+        return x0 - pad, y0 - pad, x1 + pad, y1 + pad
+    return x0, y0, x1, y1
+
+
+class GridIndex:
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.boxes = [entity_bbox(entity) for entity in entities]
+        self.cells = {}
+        self.large = []
+
+        if self.boxes:
+            self.x0 = min(box[0] for box in self.boxes)
+            self.y0 = min(box[1] for box in self.boxes)
+            x1 = max(box[2] for box in self.boxes)
+            y1 = max(box[3] for box in self.boxes)
+        else:
+            self.x0 = self.y0 = x1 = y1 = 0.0
+
+        # Square cells sized so the plan's extents hold about CELL_OCCUPANCY
+        # entities per cell
+        width = max(x1 - self.x0, 1e-6)
+        height = max(y1 - self.y0, 1e-6)
+        cell_count = max(1.0, len(self.boxes) / CELL_OCCUPANCY)
+        self.cell_size = math.sqrt(width * height / cell_count)
+        self.columns = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+
+        for i, box in enumerate(self.boxes):
+            c0, r0, c1, r1 = self._cell_range(box)
+            if (c1 - c0 + 1) * (r1 - r0 + 1) > MAX_ENTITY_CELLS:
+                self.large.append(i)
+                continue
+            for column in range(c0, c1 + 1):
+                for row in range(r0, r1 + 1):
+                    self.cells.setdefault((column, row), []).append(i)
+
+    def _cell_range(self, box):
+        # Cells covered by box, clamped to the grid
+        size = self.cell_size
+        c0 = min(max(int((box[0] - self.x0) // size), 0), self.columns - 1)
+        r0 = min(max(int((box[1] - self.y0) // size), 0), self.rows - 1)
+        c1 = min(max(int((box[2] - self.x0) // size), 0), self.columns - 1)
+        r1 = min(max(int((box[3] - self.y0) // size), 0), self.rows - 1)
+        return c0, r0, c1, r1
+
+    def query(self, bbox, layers=None):
+        # Entities whose box intersects bbox (x0, y0, x1, y1), optionally only
+        # on the given layers, in drawing order
+        x0, y0, x1, y1 = bbox
+        c0, r0, c1, r1 = self._cell_range(bbox)
+        candidates = set(self.large)
+        for column in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                candidates.update(self.cells.get((column, row), ()))
+
+        hits = []
+        for i in candidates:
+            bx0, by0, bx1, by1 = self.boxes[i]
+            if bx0 > x1 or bx1 < x0 or by0 > y1 or by1 < y0:
+                continue
+            if layers is not None and self.entities[i].layer not in layers:
+                continue
+            hits.append(i)
+        hits.sort()
+        return [self.entities[i] for i in hits]
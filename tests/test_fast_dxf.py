@@ -0,0 +1,60 @@
+# The directly written entities must export exactly as ezdxf would export
+# them, for every plan size, level of detail and precision.
+import io
+
+import ezdxf
+import pytest
+
+import backends
+import floorplan
+
+
+def render_both(monkeypatch, spec, precision=None):
+    plan = floorplan.build_model(spec)
+    monkeypatch.setattr(backends, 'FAST_DXF_EXPORT', True)
+    fast = backends.render_dxf(plan, precision=precision)
+    monkeypatch.setattr(backends, 'FAST_DXF_EXPORT', False)
+    slow = backends.render_dxf(plan, precision=precision)
+    return fast, slow
+
+
+def entities(data):
+    doc = ezdxf.read(io.StringIO(data.decode('utf-8')))
+    return [(e.dxftype(), e.dxf.handle, sorted(e.dxfattribs().items())) for e in doc.modelspace()]
+
+
+@pytest.mark.parametrize('detail', floorplan.DETAIL_LEVELS)
+@pytest.mark.parametrize('rooms', [1, 3, 12, backends.REGION_MIN_ROOMS])
+def test_fast_export_matches_ezdxf(monkeypatch, rooms, detail):
+    spec = floorplan.parse_spec({'rooms': rooms, 'width': 4 * rooms ** 0.5 + 6, 'length': 4 * rooms ** 0.5 + 6,
+                                 'seed': rooms, 'detail': detail})
+    fast, slow = render_both(monkeypatch, spec)
+    assert entities(fast) == entities(slow)
+    assert fast == slow
+
+
+@pytest.mark.parametrize('precision', [0, 3])
+def test_fast_export_matches_ezdxf_compact(monkeypatch, precision):
+    spec = floorplan.parse_spec({'rooms': 9, 'width': 15.5, 'length': 11.25})
+    fast, slow = render_both(monkeypatch, spec, precision)
+    assert fast == slow
+    # Only coordinates are rounded; sizes must survive any precision
+    doc = ezdxf.read(io.StringIO(fast.decode('utf-8')))
+    texts = doc.modelspace().query('TEXT')
+    circles = doc.modelspace().query('CIRCLE ARC')
+    assert texts and circles
+    assert all(text.dxf.height > 0 for text in texts)
+    assert all(circle.dxf.radius > 0 for circle in circles)
+
+
+@pytest.mark.parametrize('rooms', [4, backends.REGION_MIN_ROOMS])
+def test_dimensions_have_geometry_blocks(rooms):
+    # ezdxf's audit, like CAD programs, drops dimensions without a block
+    spec = floorplan.parse_spec({'rooms': rooms, 'width': 4 * rooms ** 0.5 + 6, 'length': 4 * rooms ** 0.5 + 6})
+    doc = ezdxf.read(io.StringIO(backends.render_dxf(floorplan.build_model(spec)).decode('utf-8')))
+    dimensions = doc.modelspace().query('DIMENSION')
+    assert dimensions
+    assert all(doc.blocks.get(dimension.dxf.geometry) is not None for dimension in dimensions)
+    assert all(dimension.override().get('dimtxt') for dimension in dimensions)
+    auditor = doc.audit()
+    assert not auditor.fixes and not auditor.errors